@@ -1,23 +1,126 @@
 import eel
 import os
-import requests
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import undetected_chromedriver as webdriver
-from selenium.webdriver.common.action_chains import ActionChains
 from urllib.parse import urlparse, parse_qs, unquote
 import time
+import queue
+import shutil
+import threading
+import psutil
 import warnings
-from bs4 import BeautifulSoup
-from similarity import ImageSimilarityComparator  # Ensure this is available
-import base64
-import io
-from PIL import Image
+from similarity import get_shared_comparator, MODEL_REGISTRY, PerceptualPrefilter, CandidateImage, ImageHashes  # Ensure this is available
+from embedding_cache import EmbeddingCache, content_hash
+from result_cache import ResultCache
+from delivery import ImageDelivery
+from ingest import QueryIngestor
+from downloader import ImageDownloader
+from pipeline import ImagePipeline
+from driver_pool import DriverPool, open_search_home
+from lazy_imports import IMPORT_TIMINGS
+from jobs import JobCancelled, JobManager
+from speculation import SpeculativePreparer
+from resource_policy import apply_resource_profile
+from waits import WaitEngine, any_condition, dom_ready, element_displayed, element_present, url_changed
+from selector_resolver import SelectorResolver
+from exact_matches import collect_exact_matches
+from url_resolver import RedirectResolver
+from page_images import (harvest_page_images, install_lazy_load_overrides, remove_lazy_load_overrides,
+                         trigger_lazy_images)
 
 warnings.filterwarnings('ignore')
 
+# Minimum weighted CLIP similarity for a product image to be kept
+SIMILARITY_THRESHOLD = 0.85
+# Number of candidate images scored per CLIP forward pass
+SIMILARITY_BATCH_SIZE = 16
+# Persistent state shared across searches (embedding cache, etc.)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".deltasearch")
+# Maximum number of candidate embeddings kept on disk
+EMBEDDING_CACHE_MAX_ENTRIES = 50000
+
+# Whole-search results cached per query image: entries kept, seconds they stay fresh, and the
+# perceptual hash distance under which a re-submitted photo counts as the same query
+RESULT_CACHE_MAX_ENTRIES = 200
+RESULT_CACHE_TTL = 24 * 3600
+RESULT_CACHE_MAX_DISTANCE = 4
+
+# Query images are downscaled to this longest edge (re-encoded at this JPEG quality) before they are
+# uploaded to the search and encoded; larger submissions are rejected
+QUERY_MAX_EDGE = 1600
+QUERY_JPEG_QUALITY = 90
+QUERY_MAX_BYTES = 20 * 1024 * 1024
+
+# Longest edge of the inline thumbnails sent to the UI; full images are served by URL
+DELIVERY_THUMBNAIL_EDGE = 256
+
+# Concurrent image downloads: global in-flight cap and per-host limit
+DOWNLOAD_MAX_IN_FLIGHT = 16
+DOWNLOAD_PER_HOST_LIMIT = 6
+# Downloads are abandoned past this size or below this width/height (icons, tracking pixels)
+DOWNLOAD_MAX_BYTES = 15 * 1024 * 1024
+DOWNLOAD_MIN_DIMENSION = 100
+# Capacity of each queue between pipeline stages, and threads decoding/preprocessing candidates
+PIPELINE_QUEUE_SIZE = 32
+PIPELINE_DECODE_WORKERS = 2
+
+# Warm browsers kept for searches, and jobs served by one browser before it is replaced
+DRIVER_POOL_SIZE = 2
+DRIVER_MAX_USES = 25
+# Seconds a search waits for a browser from the pool before giving up
+SEARCH_DRIVER_TIMEOUT = 60
+# Block images, media, fonts and trackers in the search browsers; image URLs stay in the DOM
+RESOURCE_BLOCKING = True
+# Product pages scraped at once (each on its own pooled browser) and the time one page may take
+PRODUCT_PARALLELISM = 2
+PRODUCT_PAGE_TIMEOUT = 60
+# Launch the browser pool during warm-up instead of on the first search, and how long to wait for it
+WARMUP_BROWSERS = True
+BROWSER_WARMUP_TIMEOUT = 60
+# Start fingerprinting, encoding and browser leasing as soon as an image is selected; unused work is
+# dropped after this many seconds, and a search waits this long for a preparation still in progress
+SPECULATIVE_PREPARE = True
+SPECULATION_TTL = 120
+SPECULATION_ADOPT_TIMEOUT = 30
+# Searches run at the same time as background jobs; further submissions queue
+SEARCH_JOB_WORKERS = 2
+# Seconds a product page may spend scrolling and triggering lazily loaded images
+LAZY_LOAD_BUDGET_SECONDS = 8
+
+# Result link redirect cache: entries kept, and seconds resolved / failed lookups stay valid
+REDIRECT_CACHE_MAX_ENTRIES = 2048
+REDIRECT_CACHE_TTL = 6 * 3600
+REDIRECT_CACHE_NEGATIVE_TTL = 600
+
+# Shared deadlines for resolving the camera button and the upload file input across all candidate selectors
+CAMERA_BUTTON_TIMEOUT = 10
+FILE_INPUT_TIMEOUT = 10
+
+PREFILTER = PerceptualPrefilter()
+DRIVER_POOL = DriverPool(DRIVER_POOL_SIZE, DRIVER_MAX_USES, resource_profile="search" if RESOURCE_BLOCKING else None)
+IMAGE_DOWNLOADER = ImageDownloader(DOWNLOAD_MAX_IN_FLIGHT, DOWNLOAD_PER_HOST_LIMIT,
+                                   max_bytes=DOWNLOAD_MAX_BYTES, min_dimension=DOWNLOAD_MIN_DIMENSION)
+EMBEDDING_CACHE = EmbeddingCache(os.path.join(CACHE_DIR, "embeddings.sqlite3"), EMBEDDING_CACHE_MAX_ENTRIES)
+IMAGE_DELIVERY = ImageDelivery(thumbnail_edge=DELIVERY_THUMBNAIL_EDGE)
+QUERY_INGESTOR = QueryIngestor(QUERY_MAX_EDGE, QUERY_JPEG_QUALITY, QUERY_MAX_BYTES)
+RESULT_CACHE = ResultCache(os.path.join(CACHE_DIR, "results.sqlite3"), RESULT_CACHE_MAX_ENTRIES,
+                           RESULT_CACHE_TTL, RESULT_CACHE_MAX_DISTANCE)
+SELECTOR_RESOLVER = SelectorResolver(os.path.join(CACHE_DIR, "selector_stats.json"))
+URL_RESOLVER = RedirectResolver(REDIRECT_CACHE_MAX_ENTRIES, REDIRECT_CACHE_TTL, REDIRECT_CACHE_NEGATIVE_TTL)
+SPECULATOR = SpeculativePreparer(DRIVER_POOL,
+                                 lambda image: get_shared_comparator(cache=EMBEDDING_CACHE).build_reference(image),
+                                 SPECULATION_TTL)
+
+# Background warm-up status shown in the UI: "pending", "loading"/"launching", "ready" or "error"
+READINESS = {"model": "pending", "browser": "pending" if WARMUP_BROWSERS else "on demand", "timings": {}}
+READINESS_LOCK = threading.Lock()
+
+# Frontend calls made from worker threads, sent in order by one greenlet on Eel's event loop
+FRONTEND_PUSHES = queue.Queue()
+# Seconds the push greenlet sleeps when there is nothing to send
+FRONTEND_PUSH_INTERVAL = 0.02
+
 # Initialize Eel
 eel.init('web')
 
@@ -50,20 +153,16 @@ def extract_product_url(href, driver=None):
     if href.lower().endswith('.pdf'):
         return f"PDF catalog link: {href}"
     
-    try:
-        response = requests.head(href, allow_redirects=True, timeout=5)
-        final_url = response.url
-        if "google.com" not in final_url:
-            return final_url
-    except Exception as e:
-        print(f"extract_product_url: Error following redirect for {href}: {str(e)}")
+    final_url = URL_RESOLVER.final_url(href)
+    if final_url and "google.com" not in final_url:
+        return final_url
     
     if "google.com" not in parsed_url.netloc:
         return href
     
     return "No product URL found"
 
-def find_camera_button(driver):
+def find_camera_button(driver, waits=None):
     """Try multiple strategies to find the camera button"""
     selectors = [
         "//button[@aria-label='Search by image']",
@@ -81,21 +180,14 @@ def find_camera_button(driver):
         "//div[contains(@class, 'HDL7pd')]//parent::div[@role='button']"
     ]
     
-    for selector in selectors:
-        try:
-            element = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH, selector))
-            )
-            return element
-        except Exception as e:
-            print(f"find_camera_button: Failed with selector {selector}: {str(e)}")
-            continue
-    
-    return None
+    return SELECTOR_RESOLVER.resolve(driver, "camera_button", selectors, CAMERA_BUTTON_TIMEOUT, waits=waits)
 
-def find_upload_elements(driver):
+def find_upload_elements(driver, waits=None):
     """Try multiple strategies to find upload elements"""
-    time.sleep(3)
+    waits = waits or WaitEngine(driver)
+    waits.until(any_condition(element_displayed(By.XPATH, "//*[contains(text(), 'Upload') or contains(@aria-label, 'Upload')]"),
+                              element_present(By.XPATH, "//input[@type='file']")),
+                5, "upload dialog open")
     
     upload_selectors = [
         "//div[contains(text(), 'Upload an image')]",
@@ -110,26 +202,13 @@ def find_upload_elements(driver):
         "//div[@role='tab']"
     ]
     
-    upload_element = None
-    for selector in upload_selectors:
-        try:
-            elements = driver.find_elements(By.XPATH, selector)
-            for element in elements:
-                if element.is_displayed() and element.is_enabled():
-                    text = element.text.lower()
-                    if 'upload' in text:
-                        upload_element = element
-                        break
-            if upload_element:
-                break
-        except Exception as e:
-            print(f"find_upload_elements: Error with selector {selector}: {str(e)}")
-            continue
+    # The dialog wait above already covers rendering, so the tab lookup is a single evaluation
+    upload_element = SELECTOR_RESOLVER.resolve(driver, "upload_tab", upload_selectors, 0,
+                                               required_words=["upload"], waits=waits)
     
     if upload_element:
         try:
             driver.execute_script("arguments[0].click();", upload_element)
-            time.sleep(3)
         except Exception as e:
             print(f"find_upload_elements: Error clicking upload element: {str(e)}")
     
@@ -139,17 +218,9 @@ def find_upload_elements(driver):
         "//*[@type='file']"
     ]
     
-    for selector in file_input_selectors:
-        try:
-            file_input = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, selector))
-            )
-            return file_input
-        except Exception as e:
-            print(f"find_upload_elements: Error finding file input with selector {selector}: {str(e)}")
-            continue
-    
-    return None
+    # File inputs are usually hidden, so only presence is required
+    return SELECTOR_RESOLVER.resolve(driver, "file_input", file_input_selectors, FILE_INPUT_TIMEOUT,
+                                     require_visible=False, waits=waits)
 
 def extract_exact_matches_results_targeted(driver, search_results_limit):
     """Targeted extraction based on the actual HTML structure"""
@@ -293,142 +364,218 @@ def extract_exact_matches_results_targeted(driver, search_results_limit):
     
     return results
 
-def download_image(url, save_path, index):
-    """Download an image from a URL and save it to the specified path"""
-    try:
-        if not url.startswith("http"):
-            return False
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            return True
-        return False
-    except Exception as e:
-        print(f"download_image: Error downloading image {index} from {url}: {str(e)}")
-        return False
+def extract_exact_matches_results_scripted(driver, search_results_limit, waits=None):
+    """Extract Exact matches results with one injected script instead of per-element lookups"""
+    waits = waits or WaitEngine(driver)
+    waits.until(element_present(By.CSS_SELECTOR, "div.ULSxyf, div.MjjYud"), 15, "exact matches results")
+    
+    results = []
+    start = time.perf_counter()
+    raw_results = collect_exact_matches(driver, search_results_limit)
+    
+    # Redirects for all containers are followed concurrently (and cached across searches)
+    def resolve(href):
+        if href and not href.startswith(("javascript:", "#", "data:")):
+            return extract_product_url(href, driver)
+        return "No product link found"
+    product_urls = URL_RESOLVER.map(resolve, [raw.get("href") for raw in raw_results])
+    
+    for i, raw in enumerate(raw_results):
+        try:
+            product_url = product_urls[i]
+            
+            product_title = raw.get("title") or "No title found"
+            image_url = raw.get("image") or "No image found"
+            
+            source = "Unknown source"
+            if product_url and product_url.startswith("http"):
+                source = urlparse(product_url).netloc.replace("www.", "")
+            
+            metadata = {}
+            size_text = raw.get("size")
+            if size_text and 'x' in size_text:
+                metadata['size'] = size_text
+            if raw.get("source_name"):
+                metadata['source_name'] = raw["source_name"]
+                source = raw["source_name"]
+            
+            if (product_url not in ["No product link found", "No product URL found"] or 
+                product_title not in ["No title found"] or 
+                image_url not in ["No image found"]):
+                results.append({
+                    "title": product_title,
+                    "image_url": image_url,
+                    "product_url": product_url,
+                    "source": source,
+                    "metadata": metadata
+                })
+        except Exception as e:
+            print(f"extract_exact_matches_results_scripted: Error processing container {i}: {str(e)}")
+    
+    print(f"extract_exact_matches_results_scripted: Read {len(raw_results)} containers in {time.perf_counter() - start:.3f}s")
+    return results
+
+def scrape_product_images(driver, product_url, save_folder, reference, stats=None, waits=None, product_index=0,
+                          accepted=None, on_accepted=None, cancel=None):
+    """Scrape all images from a product page and keep those similar to the reference query image.
 
-def scrape_product_images(driver, product_url, save_folder, image_path):
-    """Scrape all images from a product page within div.imgTagWrapper"""
+    When a stats dict is given, prefilter counts (including CLIP calls saved) are added to it.
+    Page readiness waits are recorded on the given WaitEngine. Accepted images are saved as
+    product_image_<product_index + 1>_<image_index + 1>_<random>.<ext>; when an accepted list is
+    given, a {"file", "url", "score"} entry is appended to it for each one (score None and "prefilter": "accept"
+    for images the perceptual prefilter accepted without CLIP scoring), and on_accepted is called
+    with each entry as soon as the file is written. Setting the cancel event stops downloads early and
+    keeps any further image from being saved. Errors such as a page-load timeout or a crashed driver are
+    raised, so the caller reports the page as failed.
+    """
     try:
         import random
 
-        SimilarityComparator = ImageSimilarityComparator()
-        driver.get(product_url)
-        time.sleep(5)
+        SimilarityComparator = get_shared_comparator(cache=EMBEDDING_CACHE)
+        waits = waits or WaitEngine(driver)
+        if RESOURCE_BLOCKING:
+            apply_resource_profile(driver, "product")
+        override_id = install_lazy_load_overrides(driver)
+        waits.mark()
+        try:
+            driver.get(product_url)
+        finally:
+            remove_lazy_load_overrides(driver, override_id)
+        waits.until(dom_ready, 10, "product page ready")
+        waits.network_idle(5, "product page network idle")
         
         if not os.path.exists(save_folder):
             os.makedirs(save_folder)
         
-        image_urls = set()
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        img_tags = soup.find_all('img')
+        lazy_stats = trigger_lazy_images(driver, LAZY_LOAD_BUDGET_SECONDS, waits)
+        print(f"scrape_product_images: Lazy-load pass took {lazy_stats['seconds']}s over {lazy_stats['steps']} scroll steps, "
+              f"image URLs {lazy_stats['urls_before']} -> {lazy_stats['urls_after']} (stopped: {lazy_stats['stopped']})")
         
-        for img in img_tags:
-            src = img.get('src')
-            data_src = img.get('data-src')
-            zoom_src = img.get('data-zoom-image')
-            
-            if zoom_src and "http" in zoom_src:
-                image_urls.add(zoom_src)
-            elif src and "http" in src and not src.startswith("data:"):
-                image_urls.add(src)
-            elif data_src and "http" in data_src and not data_src.startswith("data:"):
-                image_urls.add(data_src)
+        # One pass over every img/srcset/data-*/picture candidate once lazy images have been triggered
+        harvest = harvest_page_images(driver)
+        image_urls = harvest.urls
+        harvest_summary = harvest.summary()
+        print(f"scrape_product_images: Harvested {harvest_summary['candidates']} candidates "
+              f"({harvest_summary['unique_urls']} unique URLs) via {harvest_summary['method']} "
+              f"in {harvest_summary['seconds']}s")
         
-        try:
-            thumbnail_selectors = [
-                "div.imgTagWrapper img",
-                "img.thumbnail",
-                "div.product-thumbnails img",
-                "div.gallery img",
-                "img[src*='thumb']",
-                "img"
-            ]
-            
-            for selector in thumbnail_selectors:
-                try:
-                    thumbnails = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for thumb in thumbnails:
-                        try:
-                            ActionChains(driver).move_to_element(thumb).perform()
-                            time.sleep(0.5)
-                        except Exception as e:
-                            print(f"scrape_product_images: Error hovering over thumbnail with selector {selector}: {str(e)}")
-                except Exception as e:
-                    print(f"scrape_product_images: Error finding thumbnails with selector {selector}: {str(e)}")
-            
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            img_tags = soup.find_all('img')
-            
-            for img in img_tags:
-                src = img.get('src')
-                data_src = img.get('data-src')
-                zoom_src = img.get('data-zoom-image')
-                
-                if zoom_src and "http" in zoom_src:
-                    image_urls.add(zoom_src)
-                elif src and "http" in src and not src.startswith("data:"):
-                    image_urls.add(src)
-                elif data_src and "http" in data_src and not data_src.startswith("data:"):
-                    image_urls.add(data_src)
+        if cancel is not None and cancel.is_set():
+            return image_urls
         
-        except Exception as e:
-            print(f"scrape_product_images: Error processing thumbnails: {str(e)}")
-        
-        fallback_selectors = [
-            "img[src*='product']",
-            "img[alt*='product']",
-            "img[data-zoom-image]",
-            "img[src*='image']",
-            "div.product-image img",
-            "div.gallery img",
-            "img[src*='http']",
-            "img"
-        ]
+        # Download, decode/prefilter, batched scoring and persistence run as overlapping stages;
+        # downloads stay in memory and only accepted images are written to save_folder
+        def persist(fetched, candidate, score):
+            if cancel is not None and cancel.is_set():
+                # The page was abandoned; save_folder may already belong to the next search
+                return
+            save_path = os.path.join(save_folder, f"product_image_{product_index + 1}_{fetched.index + 1}_{random.randint(1, 999999)}.{fetched.extension}")
+            with open(save_path, 'wb') as f:
+                f.write(candidate.data)
+            entry = {"file": os.path.basename(save_path), "url": fetched.url,
+                     "score": round(float(score), 4) if score is not None else None}
+            if score is None:
+                entry["prefilter"] = "accept"
+            if accepted is not None:
+                accepted.append(entry)
+            if on_accepted is not None:
+                on_accepted(entry)
         
-        for selector in fallback_selectors:
-            try:
-                images = driver.find_elements(By.CSS_SELECTOR, selector)
-                for img in images:
-                    src = img.get_attribute("src")
-                    data_src = img.get_attribute("data-src")
-                    zoom_src = img.get_attribute("data-zoom-image")
-                    
-                    if zoom_src and "http" in zoom_src:
-                        image_urls.add(zoom_src)
-                    elif src and "http" in src and not src.startswith("data:"):
-                        image_urls.add(src)
-                    elif data_src and "http" in data_src and not data_src.startswith("data:"):
-                        image_urls.add(data_src)
-            except Exception as e:
-                print(f"scrape_product_images: Error with fallback selector {selector}: {str(e)}")
-
-
-        for i, url in enumerate(image_urls, 1):
-            flag = True
-            file_extension = url.split('.')[-1].split('?')[0]
-            if file_extension.lower() not in ['jpg', 'jpeg', 'png', 'webp']:
-                flag = False
-            if flag:
-                save_path = os.path.join(save_folder, f"product_image_{i}_{random.randint(1, 999999)}.{file_extension}")
-                if download_image(url, save_path, i):
-                    score = SimilarityComparator.compare_images(image_path, save_path)
-                    if score is None:
-                        print(f"scrape_product_images: Image similarity comparison failed for {save_path}")
-                    elif not score >= 0.85:
-                        os.remove(save_path)
-                    else:
-                        pass
-        
-        return list(image_urls)
+        pipeline = ImagePipeline(IMAGE_DOWNLOADER, SimilarityComparator, PREFILTER,
+                                 threshold=SIMILARITY_THRESHOLD, batch_size=SIMILARITY_BATCH_SIZE,
+                                 queue_size=PIPELINE_QUEUE_SIZE, download_workers=DOWNLOAD_MAX_IN_FLIGHT,
+                                 decode_workers=PIPELINE_DECODE_WORKERS)
+        pipeline_result = pipeline.run(image_urls, reference, persist, cancel)
+        
+        if stats is not None:
+            for key, value in pipeline_result.prefilter.summary().items():
+                stats[key] = stats.get(key, 0) + value
+            stats["harvest_candidates"] = stats.get("harvest_candidates", 0) + harvest_summary["candidates"]
+            stats["harvest_seconds"] = round(stats.get("harvest_seconds", 0) + harvest_summary["seconds"], 3)
+        for stage in pipeline_result.stages:
+            print(f"scrape_product_images: {stage['stage']} stage: {stage['items_in']} in, {stage['items_out']} out, "
+                  f"{stage['errors']} errors, {stage['items_per_second']} items/s, utilization {stage['utilization']}")
+        
+        return image_urls
     
     except Exception as e:
+        # Re-raised so the page is reported as failed rather than as a page without matches
         print(f"scrape_product_images: General error scraping {product_url}: {str(e)}")
-        return []
+        raise
+
+def scrape_product_pages(products, save_folder, reference, on_accepted=None, cancel=None):
+    """Scrape several product pages concurrently on pooled drivers.
+
+    Returns one entry per product, in the order of products, with its image URLs, prefilter stats,
+    wait summary, accepted images and error (None on success). A page that exceeds its timeout is reported as failed
+    without holding up the others. on_accepted(product_index, entry) is called for every accepted image as it is
+    saved; setting the cancel event abandons pages that have not finished.
+    """
+    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+    
+    # Each page stops on its own event, set when the page times out or fails, or when the search is cancelled
+    page_cancels = [threading.Event() for _ in products]
+    
+    def notify_for(index):
+        def notify(entry):
+            # Pages already reported as failed must not push images after the search result
+            if not page_cancels[index].is_set():
+                on_accepted(index, entry)
+        return notify
+    
+    def scrape_one(index, product):
+        stats = {}
+        accepted = []
+        with DRIVER_POOL.lease(PRODUCT_PAGE_TIMEOUT) as driver:
+            driver.set_page_load_timeout(PRODUCT_PAGE_TIMEOUT)
+            waits = WaitEngine(driver)
+            notify = notify_for(index) if on_accepted else None
+            image_urls = scrape_product_images(driver, product['product_url'], save_folder, reference, stats, waits,
+                                               index, accepted, notify, page_cancels[index])
+        return {"image_urls": image_urls, "stats": stats, "waits": waits.summary(), "accepted": accepted, "error": None}
+    
+    parallelism = max(1, min(PRODUCT_PARALLELISM, len(products)))
+    executor = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="product-page")
+    futures = [executor.submit(scrape_one, index, product) for index, product in enumerate(products)]
+    
+    # Each product gets PRODUCT_PAGE_TIMEOUT plus the time spent waiting for a free worker
+    rounds = -(-len(products) // parallelism)
+    deadline = time.perf_counter() + PRODUCT_PAGE_TIMEOUT * (rounds + 1)
+    outcomes = []
+    for index, future in enumerate(futures):
+        try:
+            # Wake up regularly so a cancellation is noticed while a page is still running
+            while True:
+                if cancel is not None and cancel.is_set():
+                    for page_cancel in page_cancels:
+                        page_cancel.set()
+                    future.cancel()
+                    raise RuntimeError("cancelled")
+                try:
+                    outcomes.append(future.result(timeout=max(0.0, min(0.5, deadline - time.perf_counter()))))
+                    break
+                except FutureTimeoutError:
+                    if time.perf_counter() >= deadline:
+                        raise
+        except FutureTimeoutError:
+            page_cancels[index].set()
+            future.cancel()
+            print(f"scrape_product_pages: Timed out scraping {products[index]['product_url']}")
+            outcomes.append({"image_urls": [], "stats": {}, "waits": {}, "accepted": [], "error": "timeout"})
+        except Exception as e:
+            page_cancels[index].set()
+            print(f"scrape_product_pages: Error scraping {products[index]['product_url']}: {str(e)}")
+            outcomes.append({"image_urls": [], "stats": {}, "waits": {}, "accepted": [], "error": str(e)})
+    # Do not wait for hung pages; they stop at their next cancellation check and return their drivers
+    executor.shutdown(wait=False)
+    return outcomes
+
+def saved_image_sort_key(file_name):
+    """Order saved product images by product index, then image index"""
+    parts = file_name.split("_")
+    try:
+        return (int(parts[2]), int(parts[3]), file_name)
+    except (IndexError, ValueError):
+        return (float("inf"), float("inf"), file_name)
 
 @eel.expose
 def select_folder():
@@ -450,19 +597,203 @@ def select_folder():
         print(f"select_folder: Error selecting folder: {str(e)}")
         return str(e)
 
+def seconds_since_process_start():
+    """Seconds since this process was started, for cold-start timing"""
+    return round(time.time() - psutil.Process().create_time(), 3)
+
+def set_readiness(**changes):
+    """Update the warm-up status and push it to the frontend"""
+    timings = changes.pop("timings", {})
+    with READINESS_LOCK:
+        READINESS.update(changes)
+        READINESS["timings"].update(timings)
+        snapshot = dict(READINESS, timings=dict(READINESS["timings"]))
+    # The window may not be connected yet; it reads the status with get_readiness on load
+    push_to_frontend("readiness_changed", snapshot)
+
+def push_to_frontend(function_name, payload):
+    """Queue a call of an exposed JS function; safe from any thread"""
+    FRONTEND_PUSHES.put((function_name, payload))
+
+def send_frontend_pushes():
+    """Greenlet body: make the queued JS calls from Eel's own event loop.
+
+    Eel runs on gevent without monkey-patching, so its websocket sends are not safe from native
+    threads; the queue is polled without blocking so the event loop keeps serving requests.
+    """
+    while True:
+        try:
+            function_name, payload = FRONTEND_PUSHES.get_nowait()
+        except queue.Empty:
+            eel.sleep(FRONTEND_PUSH_INTERVAL)
+            continue
+        try:
+            getattr(eel, function_name)(payload)
+        except Exception as e:
+            print(f"send_frontend_pushes: Could not call {function_name}: {str(e)}")
+
+def warm_up():
+    """Load CLIP and (optionally) launch the browser pool in the background while the user picks an image"""
+    if WARMUP_BROWSERS:
+        set_readiness(browser="launching")
+        DRIVER_POOL.start()
+    
+    set_readiness(model="loading")
+    start = time.perf_counter()
+    try:
+        get_shared_comparator(cache=EMBEDDING_CACHE)
+        set_readiness(model="ready", timings={"model_seconds": round(time.perf_counter() - start, 3),
+                                              "model_ready_after_start": seconds_since_process_start(),
+                                              "imports": dict(IMPORT_TIMINGS)})
+    except Exception as e:
+        print(f"warm_up: Error loading CLIP model: {str(e)}")
+        set_readiness(model="error", error=str(e))
+    
+    if WARMUP_BROWSERS:
+        if DRIVER_POOL.wait_ready(BROWSER_WARMUP_TIMEOUT):
+            set_readiness(browser="ready", timings={"browser_ready_after_start": seconds_since_process_start()})
+        else:
+            set_readiness(browser="error")
+
+def start_warm_up():
+    """Run warm_up on a daemon thread"""
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+@eel.expose
+def get_readiness():
+    """Expose the warm-up status (model, browser, cold-start timings) to Eel"""
+    with READINESS_LOCK:
+        if "ui_connected_after_start" not in READINESS["timings"]:
+            READINESS["timings"]["ui_connected_after_start"] = seconds_since_process_start()
+        return dict(READINESS, timings=dict(READINESS["timings"]))
+
+@eel.expose
+def get_model_stats():
+    """Expose CLIP model load time and resident memory to Eel"""
+    try:
+        return MODEL_REGISTRY.stats()
+    except Exception as e:
+        print(f"get_model_stats: Error reading model stats: {str(e)}")
+        return []
+
+@eel.expose
+def get_driver_pool_stats():
+    """Expose browser pool utilization to Eel"""
+    try:
+        return DRIVER_POOL.stats()
+    except Exception as e:
+        print(f"get_driver_pool_stats: Error reading pool stats: {str(e)}")
+        return {}
+
+@eel.expose
+def get_embedding_cache_stats():
+    """Expose embedding cache hit/miss counters to Eel"""
+    try:
+        return EMBEDDING_CACHE.stats()
+    except Exception as e:
+        print(f"get_embedding_cache_stats: Error reading cache stats: {str(e)}")
+        return {}
+
+@eel.expose
+def get_redirect_cache_stats():
+    """Expose result link redirect cache counters to Eel"""
+    try:
+        return URL_RESOLVER.stats()
+    except Exception as e:
+        print(f"get_redirect_cache_stats: Error reading redirect cache stats: {str(e)}")
+        return {}
+
 @eel.expose
-def reverse_image_search_and_scrape(image_data, save_folder="test", search_results_limit=1):
-    """Perform reverse image search and scrape images, adapted for Eel"""
-    chrome_options = webdriver.ChromeOptions()
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    chrome_options.add_argument("--headless")  # Uncomment for headless mode
+def get_result_cache_stats():
+    """Expose whole-search result cache counters to Eel"""
+    try:
+        return RESULT_CACHE.stats()
+    except Exception as e:
+        print(f"get_result_cache_stats: Error reading result cache stats: {str(e)}")
+        return {}
+
+@eel.expose
+def get_selector_stats():
+    """Expose learned selector hit counts to Eel"""
+    try:
+        return SELECTOR_RESOLVER.stats()
+    except Exception as e:
+        print(f"get_selector_stats: Error reading selector stats: {str(e)}")
+        return {}
+
+@eel.expose
+def get_speculation_stats():
+    """Expose speculative preparation counters to Eel"""
+    try:
+        return SPECULATOR.stats()
+    except Exception as e:
+        print(f"get_speculation_stats: Error reading speculation stats: {str(e)}")
+        return {}
+
+@eel.expose
+def prepare_search(image_source):
+    """Start preparing a just-selected query image; returns the token a later search passes to adopt the work"""
+    if not SPECULATIVE_PREPARE:
+        return None
+    try:
+        return SPECULATOR.prepare(QUERY_INGESTOR.ingest(image_source).data)
+    except Exception as e:
+        print(f"prepare_search: Error preparing query image: {str(e)}")
+        return None
+
+@eel.expose
+def discard_prepared_search(token=None):
+    """Drop a preparation whose image was deselected or replaced"""
+    try:
+        return SPECULATOR.discard(token)
+    except Exception as e:
+        print(f"discard_prepared_search: Error discarding {token}: {str(e)}")
+        return False
+
+@eel.expose
+def reverse_image_search_and_scrape(image_source, save_folder="test", search_results_limit=1, bypass_cache=False,
+                                    prepared_token=None, deliver=True, job=None):
+    """Perform reverse image search and scrape images, adapted for Eel.
+
+    image_source is a finished chunked upload ({"upload_id": ...}), a local file path or a data URL;
+    it is validated and downscaled to QUERY_MAX_EDGE before it is uploaded or encoded.
+
+    Results of earlier searches for the same (or a near-identical) image are returned from
+    RESULT_CACHE unless bypass_cache is set. When run as a background job, stage changes and
+    every accepted image are pushed through the job as they happen, and cancellation is
+    honoured between stages. A prepared_token from prepare_search lets the search adopt the
+    fingerprint, reference embeddings and browser prepared when the image was selected. Headless
+    callers pass deliver=False to skip building thumbnails and serving URLs; "images" is then empty.
+    """
+    def stage(name, **data):
+        if job is not None:
+            job.stage(name, **data)
+    
+    # Every accepted image is sent once, as a thumbnail plus a local URL to the full file
+    delivered = set()
+    
+    def deliver_images(entries):
+        if not deliver:
+            return []
+        images = []
+        for entry in entries:
+            try:
+                image = IMAGE_DELIVERY.deliver(os.path.join(save_folder, entry["file"]), delivered)
+            except Exception as e:
+                # One unreadable file must not cost the search its other images
+                print(f"deliver_images: Error delivering {entry['file']}: {str(e)}")
+                continue
+            if image is not None:
+                images.append(dict(image, url=entry.get("url"), score=entry.get("score")))
+        return images
+    
+    def emit_image(product_index, entry):
+        if job is not None:
+            for image in deliver_images([entry]):
+                job.emit("image", product_index=product_index, **image)
     
     driver = None
+    temp_image_path = None
     try:
         search_results_limit = 1 if search_results_limit < 1 else search_results_limit
         
@@ -477,54 +808,95 @@ def reverse_image_search_and_scrape(image_data, save_folder="test", search_resul
             if os.path.isfile(file_path):
                 os.remove(file_path)
 
-        # Save base64 image to temporary file
-        image_data = image_data.split(',')[1]  # Remove data:image/jpeg;base64, prefix
-        image_bytes = base64.b64decode(image_data)
-        temp_image_path = os.path.join(save_folder, "temp_image.jpg")
+        # Save the normalized query image to a temporary file for the upload
+        ingested = QUERY_INGESTOR.ingest(image_source)
+        image_bytes = ingested.data
+        query = CandidateImage(image_bytes, "query")
+        temp_image_path = os.path.join(save_folder, f"temp_image{ingested.extension}")
         with open(temp_image_path, 'wb') as f:
             f.write(image_bytes)
+        print(f"reverse_image_search_and_scrape: Query image {ingested.original_width}x{ingested.original_height} "
+              f"{ingested.original_format} -> {ingested.width}x{ingested.height} {ingested.format} in {ingested.seconds}s")
         
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        stage("fingerprint")
+        # Adopt the work started when the image was selected; the caller now owns its browser
+        prepared = SPECULATOR.adopt(prepared_token, image_bytes, SPECULATION_ADOPT_TIMEOUT)
+        if prepared is not None:
+            driver = prepared.driver
+            try:
+                # The browser sat idle since the image was selected; make sure it is still alive
+                if driver is not None:
+                    driver.current_url
+            except Exception:
+                DRIVER_POOL.release(driver, broken=True)
+                driver = None
+            print(f"reverse_image_search_and_scrape: Adopted preparation {prepared.token} ({prepared.seconds}s)")
+        elif prepared_token:
+            # The presented preparation could not be used; it would only hold a browser until it expires
+            SPECULATOR.discard(prepared_token)
         
-        driver.get("https://images.google.com")
-        time.sleep(5)
+        # Fingerprint the query: exact bytes, plus a perceptual hash for re-encoded or resized copies
+        fingerprint = prepared.fingerprint if prepared is not None else None
+        if fingerprint is None:
+            try:
+                fingerprint = (content_hash(image_bytes), ImageHashes.from_image(query).phash)
+            except Exception as e:
+                print(f"reverse_image_search_and_scrape: Error fingerprinting query image: {str(e)}")
         
-        # Handle cookie consent
-        try:
-            accept_selectors = [
-                "//button[contains(text(), 'Accept')]",
-                "//button[contains(text(), 'I agree')]", 
-                "//button[contains(text(), 'Accept all')]",
-                "//div[contains(text(), 'Accept')][@role='button']",
-                "//button[@id='L2AGLb']"
-            ]
-            for selector in accept_selectors:
+        if fingerprint is not None and not bypass_cache:
+            cached = RESULT_CACHE.get(fingerprint[0], fingerprint[1], search_results_limit)
+            if cached is not None:
+                payload, files = cached
                 try:
-                    accept_button = WebDriverWait(driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    accept_button.click()
-                    time.sleep(2)
-                    break
-                except Exception as e:
-                    print(f"reverse_image_search_and_scrape: Error with cookie consent selector {selector}: {str(e)}")
-        except Exception as e:
-            print(f"reverse_image_search_and_scrape: Error handling cookie consent: {str(e)}")
+                    for path in files:
+                        shutil.copyfile(path, os.path.join(save_folder, os.path.basename(path)))
+                except OSError as e:
+                    # The entry was evicted or replaced while it was being read
+                    print(f"reverse_image_search_and_scrape: Cached images unavailable, searching again: {str(e)}")
+                    cached = None
+            if cached is not None:
+                stage("cached", images=len(files))
+                for entry in payload.get("accepted_images", []):
+                    emit_image(saved_image_sort_key(entry["file"])[0] - 1, entry)
+                print(f"reverse_image_search_and_scrape: Returning cached result with {len(files)} images")
+                return dict(payload, cached=True, query=ingested.summary(),
+                            images=deliver_images(payload.get("accepted_images", [])))
+        
+        # Encode the query image once for every product in this search
+        stage("encoding query")
+        reference = prepared.reference if prepared is not None else None
+        if reference is None:
+            try:
+                reference = get_shared_comparator(cache=EMBEDDING_CACHE).build_reference(query)
+            except Exception as e:
+                print(f"reverse_image_search_and_scrape: Error encoding query image: {str(e)}")
+                return {"error": f"Could not process the query image: {str(e)}"}
+        
+        # Pooled drivers are already parked on the search home page with cookies accepted
+        stage("uploading")
+        if driver is None:
+            driver = DRIVER_POOL.acquire(SEARCH_DRIVER_TIMEOUT)
+        waits = WaitEngine(driver)
+        if not DRIVER_POOL.warm:
+            open_search_home(driver, waits)
         
-        camera_button = find_camera_button(driver)
+        camera_button = find_camera_button(driver, waits)
         if not camera_button:
             raise Exception("Could not find camera button")
         
         driver.execute_script("arguments[0].click();", camera_button)
-        time.sleep(3)
         
-        file_input = find_upload_elements(driver)
+        file_input = find_upload_elements(driver, waits)
         if not file_input:
             raise Exception("Could not find file input element")
         
+        upload_url = driver.current_url
         file_input.send_keys(os.path.abspath(temp_image_path))
-        time.sleep(10)
+        waits.until(url_changed(upload_url), 20, "upload results page")
+        waits.until(dom_ready, 10, "upload results ready")
+        waits.until(any_condition(element_displayed(By.XPATH, "//*[contains(text(), 'Exact matches')]"),
+                                  element_present(By.CSS_SELECTOR, "div.ULSxyf, div.MjjYud")),
+                    10, "upload results rendered")
         
         # Try Exact matches first
         exact_matches_selectors = [
@@ -535,26 +907,21 @@ def reverse_image_search_and_scrape(image_data, save_folder="test", search_resul
             "//*[contains(text(), 'Exact matches')]"
         ]
         
-        exact_matches_tab = None
-        for selector in exact_matches_selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, selector)
-                for element in elements:
-                    if element.is_displayed() and element.is_enabled():
-                        text = element.text.lower()
-                        if 'exact' in text and 'match' in text:
-                            exact_matches_tab = element
-                            break
-                if exact_matches_tab:
-                    break
-            except Exception as e:
-                print(f"reverse_image_search_and_scrape: Error with exact matches selector {selector}: {str(e)}")
+        exact_matches_tab = SELECTOR_RESOLVER.resolve(driver, "exact_matches_tab", exact_matches_selectors, 0,
+                                                      required_words=["exact", "match"], waits=waits)
         
         if exact_matches_tab:
+            results_url = driver.current_url
             driver.execute_script("arguments[0].click();", exact_matches_tab)
-            time.sleep(5)
+            waits.until(url_changed(results_url), 10, "exact matches page")
+            waits.until(dom_ready, 10, "exact matches ready")
         
-        results = extract_exact_matches_results_targeted(driver, search_results_limit)
+        stage("reading results")
+        try:
+            results = extract_exact_matches_results_scripted(driver, search_results_limit, waits)
+        except Exception as e:
+            print(f"reverse_image_search_and_scrape: Scripted extraction failed, using element lookups: {str(e)}")
+            results = extract_exact_matches_results_targeted(driver, search_results_limit)
         
         valid_results = [r for r in results if r['product_url'] not in 
                         ["No link found", "No product URL found (Google search link)", 
@@ -564,42 +931,131 @@ def reverse_image_search_and_scrape(image_data, save_folder="test", search_resul
         if not valid_results:
             return {"error": "No valid product URLs found"}
         
-        saved_images = []
-        for i in range(len(valid_results)):
-            current_product = valid_results[i]
-            image_urls = scrape_product_images(driver, current_product['product_url'], save_folder, temp_image_path)
-
-            for img_file in os.listdir(save_folder):
-                if img_file.startswith("product_image_"):
-                    img_path = os.path.join(save_folder, img_file)
-                    with open(img_path, 'rb') as f:
-                        img_data = base64.b64encode(f.read()).decode('utf-8')
-                        saved_images.append(f"data:image/{img_file.split('.')[-1]};base64,{img_data}")
+        # Free the search browser so every pooled driver can take a product page
+        DRIVER_POOL.release(driver)
+        driver = None
+        
+        stage("scraping products", products=len(valid_results))
+        outcomes = scrape_product_pages(valid_results, save_folder, reference, emit_image,
+                                        job.cancel_event if job is not None else None)
+        if job is not None:
+            job.check()
+        
+        image_urls = []
+        prefilter_stats = {}
+        wait_records = list(waits.records)
+        for outcome in outcomes:
+            image_urls += [url for url in outcome["image_urls"] if url not in image_urls]
+            for key, value in outcome["stats"].items():
+                prefilter_stats[key] = round(prefilter_stats.get(key, 0) + value, 3)
+            wait_records += outcome["waits"].get("waits", [])
+        
+        # Pages that timed out may still be writing; only completed pages are reported
+        accepted_images = sorted((entry for outcome in outcomes if outcome["error"] is None
+                                  for entry in outcome["accepted"]),
+                                 key=lambda entry: saved_image_sort_key(entry["file"]))
+        # Images streamed to a job are not repeated here
+        images = deliver_images(accepted_images)
 
+        wait_summary = {
+            "total_seconds": round(sum(record["seconds"] for record in wait_records), 3),
+            "timeouts": sum(1 for record in wait_records if not record["satisfied"]),
+            "waits": wait_records,
+        }
+        print(f"reverse_image_search_and_scrape: Spent {wait_summary['total_seconds']}s waiting for pages")
+        print(f"reverse_image_search_and_scrape: Prefilter saved {prefilter_stats.get('clip_calls_saved', 0)} CLIP calls")
         first_product = valid_results[0]
         
-        return {
+        response = {
             "product_title": first_product['title'],
             "product_url": first_product['product_url'],
             "source": first_product['source'],
             "image_urls": image_urls,
-            "saved_images": saved_images,
+            "images": images,
+            "prefilter": prefilter_stats,
+            "waits": wait_summary,
+            "product_errors": [outcome["error"] for outcome in outcomes],
+            "accepted_images": accepted_images,
+            "cached": False,
+            "query": ingested.summary(),
         }
         
+        # Partial results (a page failed or timed out) are not worth replaying
+        if fingerprint is not None and all(outcome["error"] is None for outcome in outcomes):
+            try:
+                payload = {key: value for key, value in response.items() if key != "images"}
+                RESULT_CACHE.put(fingerprint[0], fingerprint[1], search_results_limit, payload,
+                                 [os.path.join(save_folder, entry["file"]) for entry in accepted_images])
+            except Exception as e:
+                print(f"reverse_image_search_and_scrape: Error caching search result: {str(e)}")
+        return response
+        
+    except JobCancelled:
+        raise
+    
     except Exception as e:
         return {"error": str(e)}
         
     finally:
         if driver:
             try:
-                driver.quit()
+                DRIVER_POOL.release(driver)
             except Exception as e:
-                print(f"reverse_image_search_and_scrape: Error closing driver: {str(e)}")
+                print(f"reverse_image_search_and_scrape: Error returning driver to pool: {str(e)}")
         # Clean up temporary image
-        if os.path.exists(temp_image_path):
+        if temp_image_path and os.path.exists(temp_image_path):
             os.remove(temp_image_path)
 
+def emit_search_event(event):
+    """Push a search job event to the frontend"""
+    push_to_frontend("search_event", event)
+
+JOB_MANAGER = JobManager(emit_search_event, SEARCH_JOB_WORKERS)
+
+def run_search_job(image_source, save_folder, search_results_limit, bypass_cache, prepared_token, job):
+    """Job body: run the search; images are streamed as they are accepted, so the final result carries none"""
+    result = reverse_image_search_and_scrape(image_source, save_folder, search_results_limit, bypass_cache,
+                                             prepared_token, job=job)
+    if result and not result.get("error"):
+        result["image_count"] = len(result.get("accepted_images", []))
+        result["first_result_seconds"] = job.first_result_seconds
+    return result
+
+@eel.expose
+def submit_search(image_source, save_folder="test", search_results_limit=1, bypass_cache=False, prepared_token=None):
+    """Start a search in the background and return its job id; progress arrives through search_event"""
+    try:
+        return JOB_MANAGER.submit(run_search_job, image_source, save_folder, search_results_limit, bypass_cache,
+                                  prepared_token)
+    except Exception as e:
+        print(f"submit_search: Error submitting search: {str(e)}")
+        return None
+
+@eel.expose
+def cancel_search(job_id):
+    """Cancel a running search job"""
+    try:
+        return JOB_MANAGER.cancel(job_id)
+    except Exception as e:
+        print(f"cancel_search: Error cancelling {job_id}: {str(e)}")
+        return False
+
+@eel.expose
+def get_search_status(job_id):
+    """Expose the progress of a search job to Eel"""
+    try:
+        return JOB_MANAGER.status(job_id)
+    except Exception as e:
+        print(f"get_search_status: Error reading status of {job_id}: {str(e)}")
+        return None
+
 # Start Eel
 if __name__ == "__main__":
-    print("Starting Eel web server on port 3904")
-    eel.start('index.html', size=(800, 600), port=3904)
\ No newline at end of file
+    print(f"Starting Eel web server on port 3904 ({seconds_since_process_start()}s after process start)")
+    READINESS["timings"]["imports_done_after_start"] = seconds_since_process_start()
+    eel.spawn(send_frontend_pushes)
+    start_warm_up()
+    try:
+        eel.start('index.html', size=(800, 600), port=3904)
+    finally:
+        DRIVER_POOL.shutdown()
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""Headless batch runner: search a folder or manifest of query images without the Eel window.
+
+Each query goes through the same search, scrape and scoring code as the GUI, sharing the
+browser pool, CLIP model and caches across queries. One JSON line per query is appended to the
+output file as soon as it finishes, so an interrupted batch resumes where it stopped.
+
+Examples:
+    python batch_search.py catalog/ -o results.jsonl --concurrency 2
+    python batch_search.py --manifest queries.txt -o results.jsonl --retry-failed
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set, Tuple
+import DeltaSearch
+
+# File extensions picked up when scanning a folder of query images
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+
+
+def collect_queries(folder: Optional[str] = None, manifest: Optional[str] = None,
+                    recursive: bool = False) -> List[Tuple[str, str]]:
+    """
+    List the query images of a batch.
+
+    Args:
+        folder (Optional[str]): Folder of query images
+        manifest (Optional[str]): Text file with one image path per line; relative paths are relative to the manifest, "#" starts a comment
+        recursive (bool): Also scan subfolders of folder (default: False)
+
+    Returns:
+        List[Tuple[str, str]]: (query id, absolute image path) pairs in a stable order
+    """
+    queries = []
+    if folder:
+        folder = os.path.abspath(folder)
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    queries.append((os.path.relpath(path, folder).replace(os.sep, "/"), path))
+            if not recursive:
+                break
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = line.split("#", 1)[0].strip()
+                if entry:
+                    queries.append((entry, os.path.normpath(os.path.join(base, entry))))
+
+    # A query listed twice is searched once
+    unique: Dict[str, str] = {}
+    for query_id, path in queries:
+        unique.setdefault(query_id, path)
+    return list(unique.items())
+
+
+def load_finished(output: str, retry_failed: bool = False) -> Set[str]:
+    """
+    Read the ids of queries an earlier run already recorded.
+
+    Args:
+        output (str): JSONL output file of the batch
+        retry_failed (bool): Treat queries recorded with an error as unfinished (default: False)
+
+    Returns:
+        Set[str]: Ids of queries to skip
+    """
+    finished: Set[str] = set()
+    if not os.path.exists(output):
+        return finished
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # The last line of a run killed mid-write
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                finished.add(record.get("query"))
+    return finished
+
+
+class RecordWriter:
+    """Appends one JSON line per query, flushed to disk immediately so a crash loses at most the line being written."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the output file for appending.
+
+        Args:
+            path (str): JSONL output file
+        """
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock: threading.Lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append a record."""
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Close the output file."""
+        with self._lock:
+            self._file.close()
+
+
+def query_folder(results_dir: str, query_id: str) -> str:
+    """
+    Folder a query's images are saved under; search results go to its Delta_Search_Results subfolder.
+
+    Every search wipes its results folder, so distinct query ids must never share one: the
+    readable name keeps the full file name, and a short hash of the id tells apart ids that
+    flatten to the same name (e.g. "a/b.jpg" and "a__b.jpg").
+
+    Args:
+        results_dir (str): Folder the per-query image folders are created in
+        query_id (str): Id of the query in the batch
+
+    Returns:
+        str: The query's folder
+    """
+    name = query_id.replace("/", "__").replace("\\", "__").replace(":", "_")
+    digest = hashlib.sha1(query_id.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(results_dir, f"{name}-{digest}")
+
+
+def run_query(query_id: str, path: str, results_dir: str, search_results_limit: int,
+              bypass_cache: bool) -> Dict[str, Any]:
+    """
+    Search one query image and build its output record.
+
+    Args:
+        query_id (str): Id of the query in the batch
+        path (str): Query image file
+        results_dir (str): Folder the per-query image folders are created in
+        search_results_limit (int): Search results scraped per query
+        bypass_cache (bool): Ignore cached results of earlier searches
+
+    Returns:
+        Dict[str, Any]: The JSONL record
+    """
+    start = time.perf_counter()
+    folder = query_folder(results_dir, query_id)
+    record: Dict[str, Any] = {"query": query_id, "path": path}
+    try:
+        result = DeltaSearch.reverse_image_search_and_scrape(path, folder, search_results_limit, bypass_cache,
+                                                             deliver=False)
+    except Exception as e:
+        result = {"error": str(e)}
+
+    if result.get("error"):
+        record.update(status="error", error=result["error"])
+    else:
+        image_folder = os.path.join(folder, "Delta_Search_Results")
+        record.update(
+            status="ok",
+            product_title=result["product_title"],
+            product_url=result["product_url"],
+            source=result["source"],
+            cached=result["cached"],
+            results=[dict(entry, file=os.path.join(image_folder, entry["file"]))
+                     for entry in result["accepted_images"]],
+            image_urls=result["image_urls"],
+            product_errors=result["product_errors"],
+            query_image=result.get("query"),
+            prefilter=result["prefilter"],
+            wait_seconds=result["waits"]["total_seconds"],
+        )
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    record["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    return record
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line arguments of the batch runner."""
+    parser = argparse.ArgumentParser(description="Run DeltaSearch over a folder or manifest of query images.")
+    parser.add_argument("folder", nargs="?", help="Folder of query images")
+    parser.add_argument("--manifest", help="Text file listing one query image path per line")
+    parser.add_argument("--recursive", action="store_true", help="Also search images in subfolders of the folder")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file one record per query is appended to")
+    parser.add_argument("--results-dir", help="Folder for saved product images (default: <output name>_images)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Queries searched at the same time (default: 2)")
+    parser.add_argument("--browsers", type=int,
+                        help="Browsers in the shared pool (default: the larger of the GUI pool size and --concurrency)")
+    parser.add_argument("--search-results", type=int, default=1,
+                        help="Search results scraped per query (default: 1)")
+    parser.add_argument("--bypass-cache", action="store_true", help="Ignore cached results of earlier searches")
+    parser.add_argument("--retry-failed", action="store_true", help="Search again queries recorded with an error")
+    parser.add_argument("--restart", action="store_true", help="Discard the output file instead of resuming")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a batch.
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments (default: sys.argv)
+
+    Returns:
+        int: Exit code; 1 if any query failed
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.folder and not args.manifest:
+        parser.error("give a folder of query images and/or --manifest")
+
+    queries = collect_queries(args.folder, args.manifest, args.recursive)
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    finished = load_finished(args.output, args.retry_failed)
+    pending = [(query_id, path) for query_id, path in queries if query_id not in finished]
+    results_dir = os.path.abspath(args.results_dir or f"{os.path.splitext(args.output)[0]}_images")
+    print(f"batch_search: {len(queries)} queries, {len(queries) - len(pending)} already done, {len(pending)} to run")
+    if not pending:
+        return 0
+
+    # Size the shared pool before it launches; every query holds a browser while it searches
+    DeltaSearch.DRIVER_POOL.size = max(1, args.browsers or max(DeltaSearch.DRIVER_POOL_SIZE, args.concurrency))
+    DeltaSearch.DRIVER_POOL.start()
+    DeltaSearch.get_shared_comparator(cache=DeltaSearch.EMBEDDING_CACHE)
+
+    writer = RecordWriter(args.output)
+    executor = ThreadPoolExecutor(max_workers=max(1, args.concurrency), thread_name_prefix="batch")
+    start = time.perf_counter()
+    counts = {"ok": 0, "error": 0}
+    recorded: Set[Any] = set()
+
+    def record(future: Any) -> None:
+        result = future.result()
+        writer.write(result)
+        recorded.add(future)
+        counts[result["status"]] += 1
+        outcome = f"{len(result['results'])} images" if result["status"] == "ok" else result["error"]
+        print(f"batch_search: [{len(recorded)}/{len(pending)}] {result['query']}: {result['status']} "
+              f"({outcome}, {result['seconds']}s)")
+
+    futures = [executor.submit(run_query, query_id, path, results_dir, args.search_results, args.bypass_cache)
+               for query_id, path in pending]
+    try:
+        for future in as_completed(futures):
+            record(future)
+    except KeyboardInterrupt:
+        # Queries not started yet are left for the next run; the ones in progress are finished and recorded
+        running = [future for future in futures if future not in recorded and not future.cancel()]
+        print(f"batch_search: Interrupted; finishing {len(running)} running queries "
+              f"(press Ctrl+C again to stop now), then run the same command to resume")
+        for future in running:
+            record(future)
+        return 130
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+        DeltaSearch.DRIVER_POOL.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print(f"batch_search: {counts['ok']} ok, {counts['error']} failed in {round(elapsed, 1)}s "
+          f"({round(len(pending) / elapsed * 60, 1)} queries/min)")
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import base64
+import io
+import os
+import threading
+import uuid
+import bottle
+from typing import Any, Dict, Optional, Set
+from PIL import Image
+
+
+class ImageDelivery:
+    """Delivers accepted images to the frontend as a small inline thumbnail plus a local URL to the full file.
+
+    Full files are served by a route on Bottle's default app (the one Eel serves from), only from
+    folders registered with register_folder, so the UI fetches full resolution only when it needs it.
+    """
+
+    def __init__(self, route_prefix: str = "/delivered", thumbnail_edge: int = 256, thumbnail_quality: int = 80) -> None:
+        """
+        Initialize the delivery layer and register its route.
+
+        Args:
+            route_prefix (str): URL prefix full-size images are served under (default: "/delivered")
+            thumbnail_edge (int): Longest thumbnail edge in pixels (default: 256)
+            thumbnail_quality (int): JPEG quality of the thumbnails (default: 80)
+        """
+        self.route_prefix: str = route_prefix.rstrip("/")
+        self.thumbnail_edge: int = thumbnail_edge
+        self.thumbnail_quality: int = thumbnail_quality
+        self._folders: Dict[str, str] = {}
+        self._tokens: Dict[str, str] = {}
+        self._lock: threading.Lock = threading.Lock()
+        bottle.route(f"{self.route_prefix}/<token>/<file_name>", "GET", self._serve)
+
+    def register_folder(self, folder: str) -> str:
+        """
+        Allow the files of a folder to be served.
+
+        Args:
+            folder (str): Folder holding accepted images
+
+        Returns:
+            str: Token used in the URLs of the folder's files
+        """
+        folder = os.path.abspath(folder)
+        with self._lock:
+            token = self._tokens.get(folder)
+            if token is None:
+                token = uuid.uuid4().hex[:12]
+                self._tokens[folder] = token
+                self._folders[token] = folder
+            return token
+
+    def _serve(self, token: str, file_name: str) -> Any:
+        """Bottle handler returning a full-size image from a registered folder."""
+        with self._lock:
+            folder = self._folders.get(token)
+        if folder is None:
+            return bottle.HTTPError(404, "Unknown image folder")
+        # static_file refuses paths that escape the root folder
+        return bottle.static_file(file_name, root=folder)
+
+    def thumbnail(self, path: str) -> str:
+        """
+        Build a small JPEG thumbnail of an image file.
+
+        Args:
+            path (str): Image file
+
+        Returns:
+            str: The thumbnail as a data URI
+        """
+        with Image.open(path) as image:
+            image.draft("RGB", (self.thumbnail_edge, self.thumbnail_edge))
+            image = image.convert("RGB")
+            image.thumbnail((self.thumbnail_edge, self.thumbnail_edge))
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.thumbnail_quality, optimize=True)
+        return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+    def deliver(self, path: str, delivered: Optional[Set[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Describe one accepted image for the frontend.
+
+        Args:
+            path (str): Saved image file
+            delivered (Optional[Set[str]]): Files already delivered for the current search; path is added to it
+
+        Returns:
+            Optional[Dict[str, Any]]: File name, thumbnail data URI, full-size URL and file size, None if already delivered
+        """
+        path = os.path.abspath(path)
+        if delivered is not None:
+            if path in delivered:
+                return None
+            delivered.add(path)
+        token = self.register_folder(os.path.dirname(path))
+        file_name = os.path.basename(path)
+        return {
+            "file": file_name,
+            "thumbnail": self.thumbnail(path),
+            "full_url": f"{self.route_prefix}/{token}/{file_name}",
+            "bytes": os.path.getsize(path),
+        }
@@ -0,0 +1,294 @@
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+
+# File extension to use when saving each sniffed image type
+IMAGE_EXTENSIONS: Dict[str, str] = {
+    "jpeg": "jpg",
+    "png": "png",
+    "gif": "gif",
+    "webp": "webp",
+    "bmp": "bmp",
+}
+
+# JPEG start-of-frame markers that carry the image dimensions
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Identify an image format from its leading magic bytes.
+
+    Args:
+        head (bytes): The first bytes of the body (at least 12 bytes for WebP)
+
+    Returns:
+        Optional[str]: One of the IMAGE_EXTENSIONS keys, None if the body is not a supported image
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head.startswith(b"BM"):
+        return "bmp"
+    return None
+
+
+def _read_jpeg_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """Walk JPEG segments until a start-of-frame marker gives the dimensions."""
+    i = 2
+    while i + 9 < len(head):
+        if head[i] != 0xFF:
+            i += 1
+            continue
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(head[i + 5:i + 7], "big")
+            width = int.from_bytes(head[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(head[i + 2:i + 4], "big")
+    return None
+
+
+def read_image_size(head: bytes, image_type: str) -> Optional[Tuple[int, int]]:
+    """
+    Read image dimensions from the header bytes alone.
+
+    Args:
+        head (bytes): The bytes received so far
+        image_type (str): Format returned by sniff_image_type
+
+    Returns:
+        Optional[Tuple[int, int]]: (width, height), None if the header is incomplete or unreadable
+    """
+    try:
+        if image_type == "jpeg":
+            return _read_jpeg_size(head)
+        if image_type == "png" and len(head) >= 24:
+            return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+        if image_type == "gif" and len(head) >= 10:
+            return int.from_bytes(head[6:8], "little"), int.from_bytes(head[8:10], "little")
+        if image_type == "bmp" and len(head) >= 26:
+            width = int.from_bytes(head[18:22], "little", signed=True)
+            height = int.from_bytes(head[22:26], "little", signed=True)
+            return abs(width), abs(height)
+        if image_type == "webp" and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                return int.from_bytes(head[26:28], "little") & 0x3FFF, int.from_bytes(head[28:30], "little") & 0x3FFF
+            if chunk == b"VP8L":
+                b = head[21:25]
+                width = 1 + (((b[1] & 0x3F) << 8) | b[0])
+                height = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+                return width, height
+            if chunk == b"VP8X":
+                return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+    except Exception:
+        return None
+    return None
+
+
+class DownloadResult:
+    """Outcome of fetching one URL."""
+
+    def __init__(self, url: str, index: int) -> None:
+        """
+        Initialize an empty result.
+
+        Args:
+            url (str): The requested URL
+            index (int): Position of the URL in the requested batch
+        """
+        self.url: str = url
+        self.index: int = index
+        self.data: Optional[bytes] = None
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None
+        self.skipped: bool = False
+        self.image_type: Optional[str] = None
+        self.width: Optional[int] = None
+        self.height: Optional[int] = None
+        self.elapsed: float = 0.0
+
+    @property
+    def extension(self) -> str:
+        """File extension matching the sniffed image type."""
+        return IMAGE_EXTENSIONS.get(self.image_type or "", "jpg")
+
+    def skip(self, reason: str) -> None:
+        """Mark the download as deliberately abandoned."""
+        self.skipped = True
+        self.error = reason
+        self.data = None
+
+    @property
+    def ok(self) -> bool:
+        """True when the body was downloaded successfully."""
+        return self.data is not None
+
+
+class ImageDownloader:
+    """A concurrent, streaming image fetcher with a shared keep-alive session, per-host limits and a global in-flight cap.
+
+    Bodies are streamed: the first chunk is sniffed for image magic bytes and the header parsed for
+    dimensions, so non-images, oversized bodies and tiny images are abandoned before they finish downloading.
+    """
+
+    def __init__(self, max_in_flight: int = 16, per_host_limit: int = 6, timeout: float = 10.0,
+                 headers: Optional[Dict[str, str]] = None, max_bytes: int = 15 * 1024 * 1024,
+                 min_dimension: int = 100, chunk_size: int = 16 * 1024, max_header_bytes: int = 256 * 1024) -> None:
+        """
+        Initialize the downloader.
+
+        Args:
+            max_in_flight (int): Maximum number of requests running at once across all hosts (default: 16)
+            per_host_limit (int): Maximum number of concurrent requests to one host (default: 6)
+            timeout (float): Per-request timeout in seconds (default: 10.0)
+            headers (Optional[Dict[str, str]]): Headers sent with every request (default: desktop Chrome user agent)
+            max_bytes (int): Bodies larger than this are abandoned (default: 15 MB)
+            min_dimension (int): Images whose width or height is below this are abandoned (default: 100)
+            chunk_size (int): Size of each streamed chunk in bytes (default: 16 KB)
+            max_header_bytes (int): How far into the body to look for the dimensions (default: 256 KB)
+        """
+        self.max_in_flight: int = max(1, max_in_flight)
+        self.per_host_limit: int = max(1, per_host_limit)
+        self.timeout: float = timeout
+        self.max_bytes: int = max_bytes
+        self.min_dimension: int = min_dimension
+        self.chunk_size: int = chunk_size
+        self.max_header_bytes: int = max_header_bytes
+        self.session: requests.Session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=self.max_in_flight, pool_maxsize=self.max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="image-download")
+        # Enforced in fetch() so callers running their own threads (e.g. the pipeline) share the cap
+        self._in_flight: threading.BoundedSemaphore = threading.BoundedSemaphore(self.max_in_flight)
+        self._host_limits: Dict[str, threading.Semaphore] = {}
+        self._host_lock: threading.Lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.Semaphore:
+        """Return the concurrency limiter for the URL's host."""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            semaphore = self._host_limits.get(host)
+            if semaphore is None:
+                semaphore = threading.Semaphore(self.per_host_limit)
+                self._host_limits[host] = semaphore
+            return semaphore
+
+    def fetch(self, url: str, index: int = 0) -> DownloadResult:
+        """
+        Stream one URL, honouring the per-host limit and global in-flight cap, and abandoning bodies that fail the image checks.
+
+        Args:
+            url (str): URL to download
+            index (int): Position of the URL in its batch (default: 0)
+
+        Returns:
+            DownloadResult: The downloaded bytes, or the error or skip reason
+        """
+        result = DownloadResult(url, index)
+        if not url.startswith("http"):
+            result.error = "Not an http(s) URL"
+            return result
+
+        start = time.perf_counter()
+        try:
+            with self._host_semaphore(url), self._in_flight:
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    result.status_code = response.status_code
+                    if response.status_code == 200:
+                        self._read_body(response, result)
+                    else:
+                        result.error = f"HTTP {response.status_code}"
+        except Exception as e:
+            result.data = None
+            result.error = str(e)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _read_body(self, response: requests.Response, result: DownloadResult) -> None:
+        """
+        Stream a response body into the result, stopping early when it is not an acceptable image.
+
+        Args:
+            response (requests.Response): A streamed 200 response
+            result (DownloadResult): Result to fill in
+        """
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            result.skip(f"Too large ({content_length} bytes)")
+            return
+
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            if not chunk:
+                continue
+            body.extend(chunk)
+
+            if result.image_type is None:
+                if len(body) < 12:
+                    continue
+                result.image_type = sniff_image_type(bytes(body[:16]))
+                if result.image_type is None:
+                    content_type = response.headers.get("Content-Type", "unknown")
+                    result.skip(f"Not an image (Content-Type {content_type})")
+                    return
+
+            if result.width is None and len(body) <= self.max_header_bytes:
+                size = read_image_size(bytes(body), result.image_type)
+                if size is not None:
+                    result.width, result.height = size
+                    if min(size) < self.min_dimension:
+                        result.skip(f"Undersized image ({size[0]}x{size[1]})")
+                        return
+
+            if len(body) > self.max_bytes:
+                result.skip(f"Too large (over {self.max_bytes} bytes)")
+                return
+
+        if result.image_type is None:
+            result.skip("Not an image (empty or truncated body)")
+            return
+        result.data = bytes(body)
+
+    def fetch_all(self, urls: Iterable[str]) -> Iterator[DownloadResult]:
+        """
+        Download many URLs concurrently and yield the results in input order.
+
+        Args:
+            urls (Iterable[str]): URLs to download
+
+        Returns:
+            Iterator[DownloadResult]: One result per URL, in the order the URLs were given
+        """
+        futures = [self._executor.submit(self.fetch, url, index) for index, url in enumerate(urls)]
+        for future in futures:
+            yield future.result()
+
+    def close(self) -> None:
+        """Stop the worker threads and close pooled connections."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
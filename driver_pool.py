@@ -0,0 +1,441 @@
+from __future__ import annotations
+import threading
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from lazy_imports import LazyModule
+from resource_policy import apply_resource_profile
+from waits import WaitEngine, clear_performance_log, dom_ready, element_gone
+
+# Imported when the first browser is launched
+webdriver = LazyModule("undetected_chromedriver")
+
+SEARCH_HOME_URL = "https://images.google.com"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+COOKIE_CONSENT_SELECTORS = [
+    "//button[contains(text(), 'Accept')]",
+    "//button[contains(text(), 'I agree')]",
+    "//button[contains(text(), 'Accept all')]",
+    "//div[contains(text(), 'Accept')][@role='button']",
+    "//button[@id='L2AGLb']"
+]
+
+
+def build_chrome_options(headless: bool = True) -> webdriver.ChromeOptions:
+    """
+    Build the Chrome options used for every search browser.
+
+    Args:
+        headless (bool): Run Chrome without a window (default: True)
+
+    Returns:
+        webdriver.ChromeOptions: The options
+    """
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    if headless:
+        chrome_options.add_argument("--headless")
+    # CDP network events feed WaitEngine.network_idle
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    # Return from driver.get() at DOMContentLoaded; readiness is checked explicitly by WaitEngine
+    chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+
+def create_driver(headless: bool = True, resource_profile: Optional[str] = "search") -> webdriver.Chrome:
+    """
+    Launch a new undetected Chrome instance.
+
+    Args:
+        headless (bool): Run Chrome without a window (default: True)
+        resource_profile (Optional[str]): Resource blocking profile to apply, None to load everything (default: "search")
+
+    Returns:
+        webdriver.Chrome: The driver
+    """
+    driver = webdriver.Chrome(options=build_chrome_options(headless))
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    if resource_profile:
+        apply_resource_profile(driver, resource_profile)
+    return driver
+
+
+def accept_cookie_consent(driver: webdriver.Chrome, waits: Optional[WaitEngine] = None) -> bool:
+    """
+    Dismiss Google's cookie consent dialog if it is shown.
+
+    Args:
+        driver (webdriver.Chrome): Driver on a Google page
+        waits (Optional[WaitEngine]): Wait engine recording the wait timings (default: a new one)
+
+    Returns:
+        bool: True if a consent button was clicked
+    """
+    waits = waits or WaitEngine(driver)
+    for selector in COOKIE_CONSENT_SELECTORS:
+        try:
+            accept_button = WebDriverWait(driver, 3).until(
+                EC.element_to_be_clickable((By.XPATH, selector))
+            )
+            accept_button.click()
+            waits.until(element_gone(accept_button), 5, "consent dialog closed")
+            return True
+        except Exception as e:
+            print(f"accept_cookie_consent: Error with cookie consent selector {selector}: {str(e)}")
+    return False
+
+
+def open_search_home(driver: webdriver.Chrome, waits: Optional[WaitEngine] = None) -> None:
+    """
+    Load the image search home page and handle cookie consent.
+
+    Args:
+        driver (webdriver.Chrome): The driver
+        waits (Optional[WaitEngine]): Wait engine recording the wait timings (default: a new one)
+    """
+    waits = waits or WaitEngine(driver)
+    driver.get(SEARCH_HOME_URL)
+    waits.until(dom_ready, 10, "search home ready")
+    try:
+        accept_cookie_consent(driver, waits)
+    except Exception as e:
+        print(f"open_search_home: Error handling cookie consent: {str(e)}")
+
+
+class PooledDriver:
+    """A browser owned by a DriverPool, with its usage counters."""
+
+    def __init__(self, driver: webdriver.Chrome, launch_seconds: float) -> None:
+        """
+        Wrap a launched driver.
+
+        Args:
+            driver (webdriver.Chrome): The launched driver
+            launch_seconds (float): Time it took to launch and warm the driver
+        """
+        self.driver: webdriver.Chrome = driver
+        self.launch_seconds: float = launch_seconds
+        self.uses: int = 0
+        self.created_at: float = time.time()
+
+
+class DriverPool:
+    """A pool of pre-launched, pre-consented Chrome drivers reused across searches.
+
+    Drivers are reset between jobs and replaced after max_uses jobs or when they crash.
+    Resets and replacements run in the background so callers only wait when every driver is busy.
+    """
+
+    def __init__(self, size: int = 2, max_uses: int = 25, headless: bool = True, warm: bool = True,
+                 resource_profile: Optional[str] = "search", launch_attempts: int = 3,
+                 launch_backoff: float = 1.0, max_launch_backoff: float = 30.0) -> None:
+        """
+        Initialize the pool; no browser is launched until start() or the first acquire().
+
+        Args:
+            size (int): Number of drivers kept alive (default: 2)
+            max_uses (int): Jobs served by one driver before it is replaced (default: 25)
+            headless (bool): Run Chrome without a window (default: True)
+            warm (bool): Load the search home page and accept cookies before a driver joins the pool (default: True)
+            resource_profile (Optional[str]): Resource blocking profile idle drivers are reset to, None to disable (default: "search")
+            launch_attempts (int): Consecutive failed launches after which acquire() gives up (default: 3)
+            launch_backoff (float): Seconds to wait before relaunching after a failure, doubled per further failure (default: 1)
+            max_launch_backoff (float): Longest wait between relaunches (default: 30)
+        """
+        self.size: int = max(1, size)
+        self.max_uses: int = max(1, max_uses)
+        self.headless: bool = headless
+        self.warm: bool = warm
+        self.resource_profile: Optional[str] = resource_profile
+        self.launch_attempts: int = max(1, launch_attempts)
+        self.launch_backoff: float = launch_backoff
+        self.max_launch_backoff: float = max_launch_backoff
+        self._consecutive_failures: int = 0
+        self._last_error: Optional[str] = None
+        self._condition: threading.Condition = threading.Condition()
+        self._idle: List[PooledDriver] = []
+        self._leased: Dict[int, PooledDriver] = {}
+        self._launching: int = 0
+        self._resetting: int = 0
+        self._started: bool = False
+        self._closed: bool = False
+        self._stats: Dict[str, float] = {
+            "launched": 0,
+            "launch_failures": 0,
+            "recycled": 0,
+            "crashes": 0,
+            "acquisitions": 0,
+            "wait_seconds": 0.0,
+            "launch_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        """Launch drivers in the background until the pool is full."""
+        with self._condition:
+            if self._started or self._closed:
+                return
+            self._started = True
+            missing = self.size - len(self._idle) - len(self._leased) - self._launching - self._resetting
+            self._launching += missing
+        for _ in range(missing):
+            threading.Thread(target=self._launch, name="driver-pool-launch", daemon=True).start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Start the pool if needed and wait until at least one driver is idle, without leasing it.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            bool: True if a driver is ready
+        """
+        self.start()
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._condition:
+            while not self._idle and not self._closed:
+                if self._launching == 0 and self._resetting == 0 and not self._leased:
+                    # Every launch failed; acquire() will retry
+                    return False
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return bool(self._idle)
+
+    def _launch(self) -> None:
+        """Launch and warm one driver, then add it to the idle list."""
+        with self._condition:
+            failures = self._consecutive_failures
+        if failures:
+            # Chrome failed to start recently; do not relaunch in a tight loop
+            time.sleep(min(self.max_launch_backoff, self.launch_backoff * 2 ** (failures - 1)))
+
+        start = time.perf_counter()
+        pooled: Optional[PooledDriver] = None
+        error: Optional[str] = None
+        try:
+            driver = create_driver(self.headless, self.resource_profile)
+            if self.warm:
+                open_search_home(driver)
+            pooled = PooledDriver(driver, time.perf_counter() - start)
+        except Exception as e:
+            error = str(e)
+            print(f"DriverPool: Error launching driver: {error}")
+
+        with self._condition:
+            self._launching -= 1
+            if pooled is None:
+                self._stats["launch_failures"] += 1
+                self._consecutive_failures += 1
+                self._last_error = error
+            elif self._closed:
+                self._quit(pooled)
+            else:
+                self._consecutive_failures = 0
+                self._stats["launched"] += 1
+                self._stats["launch_seconds"] += pooled.launch_seconds
+                self._idle.append(pooled)
+            self._condition.notify_all()
+
+    def _replace(self) -> None:
+        """Launch a replacement driver in the background. Caller must hold the condition."""
+        if self._closed:
+            return
+        self._launching += 1
+        threading.Thread(target=self._launch, name="driver-pool-launch", daemon=True).start()
+
+    @staticmethod
+    def _is_alive(pooled: PooledDriver) -> bool:
+        """Check that the browser session still answers."""
+        try:
+            pooled.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled: PooledDriver) -> None:
+        """Quit a driver, ignoring errors from an already dead browser."""
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"DriverPool: Error closing driver: {str(e)}")
+
+    def acquire(self, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """
+        Take an idle driver, waiting for one if the pool is busy.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            webdriver.Chrome: A live driver, exclusively leased to the caller until release()
+        """
+        self.start()
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Driver pool is shut down")
+                while not self._idle:
+                    if self._consecutive_failures >= self.launch_attempts:
+                        # Launches keep failing: wait only for drivers already leased or launching
+                        if not self._leased and self._launching == 0 and self._resetting == 0:
+                            error = self._last_error
+                            # The next acquire() starts a fresh round of attempts
+                            self._consecutive_failures = 0
+                            raise RuntimeError(f"Could not launch a browser after {self.launch_attempts} "
+                                               f"attempts: {error}")
+                    elif len(self._leased) + self._launching + self._resetting < self.size:
+                        # Keep the pool topped up if launches failed earlier
+                        self._replace()
+                    remaining = None if deadline is None else deadline - time.perf_counter()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a browser from the pool")
+                    self._condition.wait(remaining)
+                pooled = self._idle.pop(0)
+
+            if self._is_alive(pooled):
+                break
+            # The browser died while idle; replace it and try the next one
+            with self._condition:
+                self._stats["crashes"] += 1
+                self._replace()
+            self._quit(pooled)
+
+        with self._condition:
+            pooled.uses += 1
+            self._leased[id(pooled.driver)] = pooled
+            self._stats["acquisitions"] += 1
+            self._stats["wait_seconds"] += time.perf_counter() - start
+        return pooled.driver
+
+    def release(self, driver: webdriver.Chrome, broken: bool = False) -> None:
+        """
+        Return a leased driver; it is reset for the next job, or replaced if it is spent or broken, in the background.
+
+        Args:
+            driver (webdriver.Chrome): Driver returned by acquire()
+            broken (bool): Force the driver to be replaced (default: False)
+        """
+        with self._condition:
+            pooled = self._leased.pop(id(driver), None)
+            if pooled is None:
+                return
+            self._resetting += 1
+        # Resetting loads the search home page; the caller should not wait for it
+        threading.Thread(target=self._recycle, args=(pooled, broken), name="driver-pool-reset", daemon=True).start()
+
+    def _recycle(self, pooled: PooledDriver, broken: bool) -> None:
+        """Reset a released driver and return it to the idle list, or replace it if it is spent or broken."""
+        crashed = broken or not self._is_alive(pooled)
+        spent = pooled.uses >= self.max_uses
+        if not crashed and not spent and not self._closed:
+            try:
+                self.reset(pooled.driver)
+            except Exception as e:
+                print(f"DriverPool: Error resetting driver: {str(e)}")
+                crashed = True
+
+        with self._condition:
+            self._resetting -= 1
+            if crashed or spent or self._closed:
+                self._stats["crashes" if crashed else "recycled"] += 1
+                self._replace()
+            else:
+                self._idle.append(pooled)
+            self._condition.notify_all()
+        if crashed or spent or self._closed:
+            self._quit(pooled)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[webdriver.Chrome]:
+        """
+        Acquire a driver for the duration of a with-block.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait for a driver
+
+        Returns:
+            Iterator[webdriver.Chrome]: The leased driver
+        """
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def reset(self, driver: webdriver.Chrome) -> None:
+        """
+        Clear per-job state while keeping the consent cookies, and park the driver on the search home page.
+
+        Args:
+            driver (webdriver.Chrome): Driver to reset
+        """
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            # Storage is not accessible on some pages (e.g. about:blank)
+            pass
+        if self.resource_profile:
+            # The previous job may have switched to the product page profile
+            apply_resource_profile(driver, self.resource_profile)
+        if self.warm:
+            driver.get(SEARCH_HOME_URL)
+        else:
+            driver.get("about:blank")
+        # Nothing reads the log of an idle driver; drop what the finished job left in it
+        clear_performance_log(driver)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report pool utilization.
+
+        Returns:
+            Dict[str, Any]: Pool size, idle/leased/launching/resetting counts, utilization and lifetime counters
+        """
+        with self._condition:
+            acquisitions = self._stats["acquisitions"]
+            launched = self._stats["launched"]
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._leased),
+                "launching": self._launching,
+                "resetting": self._resetting,
+                "utilization": round(len(self._leased) / self.size, 3),
+                "launched": int(launched),
+                "launch_failures": int(self._stats["launch_failures"]),
+                "last_launch_error": self._last_error,
+                "recycled": int(self._stats["recycled"]),
+                "crashes": int(self._stats["crashes"]),
+                "acquisitions": int(acquisitions),
+                "avg_wait_seconds": round(self._stats["wait_seconds"] / acquisitions, 3) if acquisitions else 0.0,
+                "avg_launch_seconds": round(self._stats["launch_seconds"] / launched, 3) if launched else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Quit every idle driver; leased drivers are quit when they are released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
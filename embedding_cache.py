@@ -0,0 +1,148 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+
+def content_hash(data: bytes) -> str:
+    """
+    Compute the content address of an image.
+
+    Args:
+        data (bytes): Raw image file bytes
+
+    Returns:
+        str: Hex SHA-256 digest of the bytes
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class EmbeddingCache:
+    """A persistent, size-bounded LRU cache of CLIP edge and raw embeddings stored in SQLite."""
+
+    def __init__(self, db_path: str, max_entries: int = 50000) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path (str): Path of the SQLite database file
+            max_entries (int): Maximum number of embeddings kept before the least recently used are evicted (default: 50000)
+        """
+        folder = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.db_path: str = db_path
+        self.max_entries: int = max(1, max_entries)
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                edge BLOB NOT NULL,
+                raw BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(digest: str, model_name: str, preprocess_version: str) -> str:
+        """
+        Build the cache key for an image.
+
+        Args:
+            digest (str): Content hash of the image bytes
+            model_name (str): Name of the CLIP model that produced the embeddings
+            preprocess_version (str): Version of the edge/raw preprocessing pipeline
+
+        Returns:
+            str: The cache key
+        """
+        return f"{model_name}|{preprocess_version}|{digest}"
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Look up the embeddings stored under a key and mark them as recently used.
+
+        Args:
+            key (str): Key built with make_key
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: Edge and raw float32 vectors, None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT dim, edge, raw FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE embeddings SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        dim, edge, raw = row
+        edge_vector = np.frombuffer(edge, dtype=np.float16, count=dim).astype(np.float32)
+        raw_vector = np.frombuffer(raw, dtype=np.float16, count=dim).astype(np.float32)
+        return edge_vector, raw_vector
+
+    def put(self, key: str, edge: np.ndarray, raw: np.ndarray) -> None:
+        """
+        Store embeddings under a key as float16, evicting the least recently used entries when full.
+
+        Args:
+            key (str): Key built with make_key
+            edge (np.ndarray): Edge feature vector
+            raw (np.ndarray): Raw image feature vector
+        """
+        edge_blob = np.asarray(edge, dtype=np.float16).ravel().tobytes()
+        raw_blob = np.asarray(raw, dtype=np.float16).ravel().tobytes()
+        dim = int(np.asarray(edge).size)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, dim, edge, raw, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, dim, edge_blob, raw_blob, time.time())
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, evictions, hit rate and current number of entries
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
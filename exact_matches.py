@@ -0,0 +1,89 @@
+from typing import Any, Dict, List
+
+# Container, title and image selectors, in the order extract_exact_matches_results_targeted tries them
+CONTAINER_SELECTORS = ["div.ULSxyf", "div.MjjYud", "div.ULSxyf div.MjjYud"]
+LINK_SELECTOR = "a.ngTNl.ggLgoc"
+TITLE_SELECTOR = "div.ZhosBf.T7iOye.MBI8Pd.dctkEf"
+TITLE_FALLBACK_SELECTORS = ["h3", "div[role='heading']", ".wyccme div"]
+IMAGE_SELECTORS = ["div.zVq10e.uhHOwf.ez24Df img", "img[id^='dimg_']", "div.GmoL0c img", "img[src*='http']", "img"]
+SIZE_SELECTOR = "span.cyspcb.DH9lqb.VBZLA span"
+SOURCE_NAME_SELECTOR = "div.xuPcX.yUTMj.OSrXXb.m46kvb.PCBdKc"
+
+# Reads every field of every result container in one round trip
+EXTRACT_SCRIPT = """
+const cfg = arguments[0];
+const limit = arguments[1];
+const text = el => el ? (el.innerText || '').trim() : null;
+
+let containers = [];
+for (const selector of cfg.containers) {
+    const found = document.querySelectorAll(selector);
+    if (found.length) { containers = Array.from(found); break; }
+}
+if (!containers.length) {
+    // Fall back to the outermost result block around each result link
+    for (const link of Array.from(document.querySelectorAll(cfg.link)).slice(0, 10)) {
+        let outer = null;
+        for (let node = link.parentElement; node; node = node.parentElement) {
+            if (node.tagName === 'DIV' && (node.classList.contains('ULSxyf') || node.classList.contains('MjjYud'))) outer = node;
+        }
+        if (outer) containers.push(outer);
+    }
+}
+
+return containers.slice(0, limit).map(container => {
+    const link = container.querySelector(cfg.link);
+
+    const titleElement = container.querySelector(cfg.title);
+    let title = text(titleElement);
+    if (titleElement && !title) {
+        for (const selector of cfg.titleFallbacks) {
+            const candidate = text(container.querySelector(selector));
+            if (candidate && candidate.length > 3) { title = candidate; break; }
+        }
+    }
+
+    let image = null;
+    for (const selector of cfg.images) {
+        for (const img of container.querySelectorAll(selector)) {
+            const src = img.src || null;
+            const dataSrc = img.getAttribute('data-src');
+            if (src && !src.startsWith('data:') && src.includes('http')) { image = src; break; }
+            if (dataSrc && !dataSrc.startsWith('data:') && dataSrc.includes('http')) { image = dataSrc; break; }
+            if (src && src.length > 50) { image = src.length > 100 ? src.slice(0, 100) + '...' : src; break; }
+        }
+        if (image) break;
+    }
+
+    return {
+        href: link ? link.href : null,
+        title: title,
+        image: image,
+        size: text(container.querySelector(cfg.size)),
+        source_name: text(container.querySelector(cfg.sourceName))
+    };
+});
+"""
+
+
+def collect_exact_matches(driver: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Read the raw fields of the first result containers on an Exact matches page with a single script call.
+
+    Args:
+        driver (Any): Selenium driver on the results page
+        limit (int): Maximum number of containers to read
+
+    Returns:
+        List[Dict[str, Any]]: One dict per container with href, title, image, size and source_name (None when missing)
+    """
+    config = {
+        "containers": CONTAINER_SELECTORS,
+        "link": LINK_SELECTOR,
+        "title": TITLE_SELECTOR,
+        "titleFallbacks": TITLE_FALLBACK_SELECTORS,
+        "images": IMAGE_SELECTORS,
+        "size": SIZE_SELECTOR,
+        "sourceName": SOURCE_NAME_SELECTOR,
+    }
+    return driver.execute_script(EXTRACT_SCRIPT, config, limit) or []
@@ -0,0 +1,261 @@
+import base64
+import io
+import os
+import threading
+import time
+import uuid
+import bottle
+from collections import OrderedDict
+from typing import Any, Dict, Union
+from PIL import Image, ImageOps
+
+# Formats accepted as query images, and the file extension each is saved with
+SUPPORTED_FORMATS: Dict[str, str] = {
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "WEBP": ".webp",
+    "GIF": ".gif",
+    "BMP": ".bmp",
+    "TIFF": ".tif",
+    "MPO": ".jpg",
+}
+# Formats passed on unchanged when they need no resizing or rotation; the rest are re-encoded as JPEG
+PASSTHROUGH_FORMATS = ("JPEG", "PNG", "WEBP")
+
+# A query source: a data URL or local file path, or {"upload_id": ...} / {"path": ...}
+QuerySource = Union[str, Dict[str, Any]]
+
+
+class IngestError(ValueError):
+    """Raised when a query image is missing, too large or not a supported image."""
+
+
+class IngestedImage:
+    """A validated query image, normalized for the search upload and the reference embedding."""
+
+    def __init__(self, data: bytes, image_format: str, width: int, height: int, original_format: str,
+                 original_width: int, original_height: int, original_bytes: int, seconds: float) -> None:
+        """
+        Initialize the result.
+
+        Args:
+            data (bytes): Normalized encoded image
+            image_format (str): PIL format of data
+            width (int): Width of data in pixels
+            height (int): Height of data in pixels
+            original_format (str): PIL format of the submitted image
+            original_width (int): Width of the submitted image
+            original_height (int): Height of the submitted image
+            original_bytes (int): Size of the submitted image in bytes
+            seconds (float): Time spent validating and normalizing
+        """
+        self.data: bytes = data
+        self.format: str = image_format
+        self.width: int = width
+        self.height: int = height
+        self.original_format: str = original_format
+        self.original_width: int = original_width
+        self.original_height: int = original_height
+        self.original_bytes: int = original_bytes
+        self.seconds: float = seconds
+
+    @property
+    def extension(self) -> str:
+        """File extension matching the normalized format."""
+        return SUPPORTED_FORMATS.get(self.format, ".jpg")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Describe the ingestion.
+
+        Returns:
+            Dict[str, Any]: Original and normalized format, dimensions and size, and the time taken
+        """
+        return {
+            "format": self.format,
+            "width": self.width,
+            "height": self.height,
+            "bytes": len(self.data),
+            "original_format": self.original_format,
+            "original_width": self.original_width,
+            "original_height": self.original_height,
+            "original_bytes": self.original_bytes,
+            "seconds": self.seconds,
+        }
+
+
+class QueryIngestor:
+    """Turns a submitted query image into bytes ready for the search upload and the reference embedding.
+
+    Images arrive as raw binary chunks POSTed to a route on Bottle's default app (the one Eel
+    serves from), as a local file path, or as a data URL for older callers. Every image is
+    validated, rotated upright from its EXIF orientation and downscaled to max_edge, so a large
+    phone photo is neither uploaded nor encoded at full resolution.
+    """
+
+    def __init__(self, max_edge: int = 1600, quality: int = 90, max_bytes: int = 20 * 1024 * 1024,
+                 route_prefix: str = "/ingest", keep: int = 8, upload_ttl: float = 600) -> None:
+        """
+        Initialize the ingestor and register its routes.
+
+        Args:
+            max_edge (int): Longest edge of the normalized image in pixels (default: 1600)
+            quality (int): JPEG quality of re-encoded images (default: 90)
+            max_bytes (int): Largest accepted submission (default: 20 MB)
+            route_prefix (str): URL prefix of the chunked upload routes (default: "/ingest")
+            keep (int): Finished uploads kept for later requests (default: 8)
+            upload_ttl (float): Seconds an upload is kept after its last chunk (default: 10 minutes)
+        """
+        self.max_edge: int = max_edge
+        self.quality: int = quality
+        self.max_bytes: int = max_bytes
+        self.route_prefix: str = route_prefix.rstrip("/")
+        self.keep: int = max(1, keep)
+        self.upload_ttl: float = upload_ttl
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._finished: "OrderedDict[str, tuple]" = OrderedDict()
+        bottle.route(self.route_prefix, "POST", self._begin_upload)
+        bottle.route(f"{self.route_prefix}/<upload_id>", "POST", self._receive_chunk)
+
+    def normalize(self, data: bytes) -> IngestedImage:
+        """
+        Validate an encoded image and normalize it.
+
+        Images already upright, within max_edge and in a common web format are passed on byte for
+        byte; everything else is re-encoded as JPEG. JPEGs are decoded at reduced scale when they
+        are much larger than max_edge.
+
+        Args:
+            data (bytes): Encoded image
+
+        Returns:
+            IngestedImage: The normalized image
+        """
+        start = time.perf_counter()
+        if not data:
+            raise IngestError("The query image is empty")
+        if len(data) > self.max_bytes:
+            raise IngestError(f"The query image exceeds {self.max_bytes // (1024 * 1024)}MB")
+        try:
+            with Image.open(io.BytesIO(data)) as probe:
+                probe.verify()
+            image = Image.open(io.BytesIO(data))
+        except Exception:
+            raise IngestError("The query is not a readable image")
+        original_format = image.format or ""
+        if original_format not in SUPPORTED_FORMATS:
+            raise IngestError(f"Unsupported image format: {original_format or 'unknown'}")
+
+        original_width, original_height = image.size
+        orientation = image.getexif().get(0x0112, 1)
+        if original_format in PASSTHROUGH_FORMATS and orientation == 1 and max(image.size) <= self.max_edge:
+            return IngestedImage(data, original_format, original_width, original_height, original_format,
+                                 original_width, original_height, len(data), round(time.perf_counter() - start, 3))
+
+        # Let the JPEG decoder skip detail that the downscale would discard anyway
+        image.draft("RGB", (self.max_edge, self.max_edge))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGB")
+        image.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        return IngestedImage(buffer.getvalue(), "JPEG", image.width, image.height, original_format,
+                             original_width, original_height, len(data), round(time.perf_counter() - start, 3))
+
+    @staticmethod
+    def _reject(status: int, message: str) -> Dict[str, Any]:
+        """Set an error status and return the message as JSON, so the UI can show it."""
+        bottle.response.status = status
+        return {"error": message}
+
+    def _begin_upload(self) -> Dict[str, Any]:
+        """Bottle handler opening a chunked upload; the query string carries the total size."""
+        try:
+            size = int(bottle.request.query.get("size", ""))
+        except ValueError:
+            return self._reject(400, "Missing upload size")
+        if size <= 0 or size > self.max_bytes:
+            return self._reject(413, f"Uploads are limited to {self.max_bytes // (1024 * 1024)}MB")
+        upload_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._expire()
+            self._pending[upload_id] = {"size": size, "buffer": bytearray(), "updated": time.monotonic()}
+        return {"upload_id": upload_id}
+
+    def _receive_chunk(self, upload_id: str) -> Dict[str, Any]:
+        """Bottle handler appending one raw binary chunk; the last chunk completes and normalizes the upload."""
+        try:
+            offset = int(bottle.request.query.get("offset", ""))
+        except ValueError:
+            return self._reject(400, "Missing chunk offset")
+        chunk = bottle.request.body.read()
+        with self._lock:
+            upload = self._pending.get(upload_id)
+            if upload is None:
+                return self._reject(404, "Unknown upload")
+            if offset != len(upload["buffer"]):
+                return self._reject(409, f"Expected offset {len(upload['buffer'])}")
+            if offset + len(chunk) > upload["size"]:
+                del self._pending[upload_id]
+                return self._reject(413, "Upload is larger than announced")
+            upload["buffer"] += chunk
+            upload["updated"] = time.monotonic()
+            if len(upload["buffer"]) < upload["size"]:
+                return {"received": len(upload["buffer"])}
+            del self._pending[upload_id]
+
+        try:
+            ingested = self.normalize(bytes(upload["buffer"]))
+        except IngestError as e:
+            return self._reject(415, str(e))
+        with self._lock:
+            self._finished[upload_id] = (ingested, time.monotonic())
+            while len(self._finished) > self.keep:
+                self._finished.popitem(last=False)
+        return dict(ingested.summary(), upload_id=upload_id, received=upload["size"])
+
+    def _expire(self) -> None:
+        """Drop uploads idle for longer than upload_ttl. Caller must hold the lock."""
+        cutoff = time.monotonic() - self.upload_ttl
+        for upload_id in [key for key, upload in self._pending.items() if upload["updated"] < cutoff]:
+            del self._pending[upload_id]
+        for upload_id in [key for key, (_, finished) in self._finished.items() if finished < cutoff]:
+            del self._finished[upload_id]
+
+    def ingest(self, source: QuerySource) -> IngestedImage:
+        """
+        Load and normalize a query image from any supported source.
+
+        Args:
+            source (QuerySource): {"upload_id": ...} for a finished chunked upload, {"path": ...} or a
+                path string for a local file, or a data URL
+
+        Returns:
+            IngestedImage: The normalized image
+        """
+        if isinstance(source, dict):
+            if source.get("upload_id"):
+                with self._lock:
+                    self._expire()
+                    entry = self._finished.get(source["upload_id"])
+                if entry is None:
+                    raise IngestError("The uploaded image is no longer available; please select it again")
+                return entry[0]
+            source = source.get("path") or ""
+
+        if not isinstance(source, str) or not source:
+            raise IngestError("No query image was given")
+        if source.startswith("data:"):
+            try:
+                data = base64.b64decode(source.split(",", 1)[1])
+            except Exception as e:
+                raise IngestError(f"Malformed image data: {str(e)}")
+            return self.normalize(data)
+
+        if not os.path.isfile(source):
+            raise IngestError(f"Could not load image at {source}")
+        if os.path.getsize(source) > self.max_bytes:
+            raise IngestError(f"The query image exceeds {self.max_bytes // (1024 * 1024)}MB")
+        with open(source, "rb") as f:
+            return self.normalize(f.read())
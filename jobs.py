@@ -0,0 +1,203 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at a checkpoint once the job has been cancelled."""
+
+
+class Job:
+    """One background search: its state, cancellation flag and the events it has pushed."""
+
+    def __init__(self, job_id: str, sink: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Initialize a pending job.
+
+        Args:
+            job_id (str): Identifier returned to the frontend
+            sink (Callable[[Dict[str, Any]], None]): Receives every event the job emits
+        """
+        self.id: str = job_id
+        self.state: str = "pending"
+        self.stage_name: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: int = 0
+        self.created: float = time.perf_counter()
+        self.first_result_seconds: Optional[float] = None
+        self.finished_seconds: Optional[float] = None
+        self._sink: Callable[[Dict[str, Any]], None] = sink
+        self._cancel: threading.Event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation has been requested."""
+        return self._cancel.is_set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        """Event set on cancellation, for code that polls or waits on it."""
+        return self._cancel
+
+    def cancel(self) -> None:
+        """Request cancellation; the job stops at its next checkpoint."""
+        self._cancel.set()
+
+    def check(self) -> None:
+        """Checkpoint: raise JobCancelled if the job has been cancelled."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def emit(self, event_type: str, **data: Any) -> None:
+        """
+        Push an event to the frontend.
+
+        Args:
+            event_type (str): "stage", "image", "done", "error" or "cancelled"
+            **data (Any): Event fields
+        """
+        if event_type == "image" and self.first_result_seconds is None:
+            self.first_result_seconds = round(time.perf_counter() - self.created, 3)
+        self.events += 1
+        event = dict(data, job_id=self.id, type=event_type)
+        try:
+            self._sink(event)
+        except Exception as e:
+            print(f"Job {self.id}: Error emitting {event_type} event: {str(e)}")
+
+    def stage(self, name: str, **data: Any) -> None:
+        """
+        Checkpoint and report that the job entered a new stage.
+
+        Args:
+            name (str): Stage name
+            **data (Any): Extra event fields
+        """
+        self.check()
+        self.stage_name = name
+        self.emit("stage", stage=name, elapsed=round(time.perf_counter() - self.created, 3), **data)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Report the job's progress.
+
+        Returns:
+            Dict[str, Any]: State, current stage, events emitted, time to first result and total time
+        """
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "stage": self.stage_name,
+            "events": self.events,
+            "first_result_seconds": self.first_result_seconds,
+            "finished_seconds": self.finished_seconds,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs jobs on a small thread pool and keeps the most recent ones for status queries."""
+
+    def __init__(self, sink: Callable[[Dict[str, Any]], None], max_workers: int = 2, keep: int = 50) -> None:
+        """
+        Initialize the manager.
+
+        Args:
+            sink (Callable[[Dict[str, Any]], None]): Receives the events of every job
+            max_workers (int): Jobs run at the same time; further jobs queue (default: 2)
+            keep (int): Finished jobs remembered for status queries (default: 50)
+        """
+        self.sink: Callable[[Dict[str, Any]], None] = sink
+        self.keep: int = max(1, keep)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                                                thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def submit(self, target: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> str:
+        """
+        Start a job in the background.
+
+        Args:
+            target (Callable[..., Dict[str, Any]]): Work function; called with the given arguments plus job=<Job>
+            *args (Any): Positional arguments for target
+            **kwargs (Any): Keyword arguments for target
+
+        Returns:
+            str: The job id
+        """
+        with self._lock:
+            job = Job(uuid.uuid4().hex[:12], self.sink)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.state in ("pending", "running"):
+                    break
+                del self._jobs[oldest_id]
+        self._executor.submit(self._run, job, target, args, kwargs)
+        return job.id
+
+    def _run(self, job: Job, target: Callable[..., Dict[str, Any]], args: tuple, kwargs: Dict[str, Any]) -> None:
+        """Run one job and emit its final event."""
+        try:
+            job.check()
+            job.state = "running"
+            result = target(*args, job=job, **kwargs)
+            job.check()
+            job.result = result
+            if result and result.get("error"):
+                job.state = "failed"
+                job.error = result["error"]
+                job.emit("error", error=job.error)
+            else:
+                job.state = "done"
+                job.emit("done", result=result)
+        except JobCancelled:
+            job.state = "cancelled"
+            job.emit("cancelled")
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            job.emit("error", error=job.error)
+        finally:
+            job.finished_seconds = round(time.perf_counter() - job.created, 3)
+            print(f"JobManager: {job.id} {job.state} in {job.finished_seconds}s "
+                  f"(first result after {job.first_result_seconds}s)")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, None if unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation of a job.
+
+        Args:
+            job_id (str): The job id
+
+        Returns:
+            bool: True if the job was pending or running
+        """
+        job = self.get(job_id)
+        if job is None or job.state not in ("pending", "running"):
+            return False
+        job.cancel()
+        return True
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Report the progress of a job.
+
+        Args:
+            job_id (str): The job id
+
+        Returns:
+            Optional[Dict[str, Any]]: Job summary, None if unknown
+        """
+        job = self.get(job_id)
+        return job.summary() if job else None
@@ -0,0 +1,50 @@
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict
+
+# Seconds each lazily imported module took to import, for cold-start reporting
+IMPORT_TIMINGS: Dict[str, float] = {}
+_import_lock: threading.RLock = threading.RLock()
+
+
+class LazyModule:
+    """Stands in for a heavy module and imports it on first attribute access.
+
+    Modules that only reference torch, clip, cv2 or undetected_chromedriver inside function bodies
+    can bind a LazyModule at import time, so importing them stays cheap until the module is used.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Initialize the proxy.
+
+        Args:
+            name (str): Full name of the module to import
+        """
+        self._name: str = name
+        self._module: Any = None
+
+    # Proxy methods are underscore-prefixed so they never shadow attributes of the real module (e.g. clip.load)
+    def _import_module(self) -> ModuleType:
+        """
+        Import the module if needed.
+
+        Returns:
+            ModuleType: The real module
+        """
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    IMPORT_TIMINGS[self._name] = round(time.perf_counter() - start, 3)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._import_module(), attribute)
+
+    def __repr__(self) -> str:
+        return f"<LazyModule {self._name} ({'not ' if self._module is None else ''}loaded)>"
@@ -0,0 +1,371 @@
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
+from waits import WaitEngine
+
+# Attributes that carry a full-size or lazily loaded image URL, in order of preference after the zoom image
+ZOOM_ATTRIBUTES = ["data-zoom-image", "data-zoom", "data-large-image", "data-hires", "data-full"]
+LAZY_ATTRIBUTES = ["data-src", "data-lazy-src", "data-original", "data-lazy", "data-url"]
+SRCSET_ATTRIBUTES = ["srcset", "data-srcset"]
+
+# Collects one candidate per <img> and <picture><source> element, with rendered and natural sizes
+HARVEST_SCRIPT = """
+const cfg = arguments[0];
+const absolute = value => {
+    if (!value) return null;
+    value = value.trim();
+    if (!value || value.startsWith('data:') || value.startsWith('blob:')) return null;
+    try { return new URL(value, document.baseURI).href; } catch (e) { return null; }
+};
+const largestFromSrcset = srcset => {
+    let best = null, bestSize = -1;
+    for (const part of (srcset || '').split(',')) {
+        const [url, descriptor] = part.trim().split(/\\s+/);
+        const size = descriptor ? parseFloat(descriptor) || 0 : 0;
+        if (url && size >= bestSize) { best = url; bestSize = size; }
+    }
+    return best;
+};
+const pick = (el, attributes, kind) => {
+    for (const name of attributes) {
+        const url = absolute(kind === 'srcset' ? largestFromSrcset(el.getAttribute(name)) : el.getAttribute(name));
+        if (url) return [url, kind];
+    }
+    return null;
+};
+
+const candidates = [];
+for (const el of document.querySelectorAll('img, picture source')) {
+    const isImg = el.tagName === 'IMG';
+    const found = pick(el, cfg.zoom, 'zoom')
+        || pick(el, cfg.srcset, 'srcset')
+        || (isImg && absolute(el.currentSrc) ? [absolute(el.currentSrc), 'src'] : null)
+        || pick(el, ['src'], 'src')
+        || pick(el, cfg.lazy, 'data');
+    if (!found) continue;
+    const sized = isImg ? el : (el.parentElement && el.parentElement.querySelector('img')) || el;
+    const rect = sized.getBoundingClientRect();
+    candidates.push({
+        url: found[0],
+        kind: isImg ? found[1] : 'picture',
+        width: Math.round(rect.width),
+        height: Math.round(rect.height),
+        natural_width: sized.naturalWidth || 0,
+        natural_height: sized.naturalHeight || 0
+    });
+}
+return candidates;
+"""
+
+
+class HarvestResult:
+    """Image URL candidates found on one page, with counts and the time the pass took."""
+
+    def __init__(self, candidates: List[Dict[str, Any]], seconds: float, method: str) -> None:
+        """
+        Initialize the result.
+
+        Args:
+            candidates (List[Dict[str, Any]]): One dict per element with url, kind and sizes
+            seconds (float): Duration of the harvesting pass
+            method (str): "script" or "html"
+        """
+        self.candidates: List[Dict[str, Any]] = candidates
+        self.seconds: float = seconds
+        self.method: str = method
+
+    @property
+    def urls(self) -> List[str]:
+        """Unique http(s) image URLs in document order."""
+        seen: Dict[str, None] = {}
+        for candidate in self.candidates:
+            url = candidate["url"]
+            if url.startswith("http") and url not in seen:
+                seen[url] = None
+        return list(seen)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the pass.
+
+        Returns:
+            Dict[str, Any]: Method, candidate and unique URL counts, counts per kind and duration
+        """
+        kinds: Dict[str, int] = {}
+        for candidate in self.candidates:
+            kinds[candidate["kind"]] = kinds.get(candidate["kind"], 0) + 1
+        return {
+            "method": self.method,
+            "candidates": len(self.candidates),
+            "unique_urls": len(self.urls),
+            "kinds": kinds,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _largest_from_srcset(srcset: Optional[str]) -> Optional[str]:
+    """Return the URL of the widest (or densest) srcset entry."""
+    best, best_size = None, -1.0
+    for part in (srcset or "").split(","):
+        pieces = part.strip().split()
+        if not pieces:
+            continue
+        try:
+            size = float(pieces[1].rstrip("wx")) if len(pieces) > 1 else 0.0
+        except ValueError:
+            size = 0.0
+        if size >= best_size:
+            best, best_size = pieces[0], size
+    return best
+
+
+def harvest_from_html(html: str, base_url: str) -> HarvestResult:
+    """
+    Harvest image candidates from static HTML, parsing only <img> and <source> tags.
+
+    Rendered sizes are unknown in this mode and reported as 0.
+
+    Args:
+        html (str): Page source
+        base_url (str): URL the page was loaded from, used to resolve relative URLs
+
+    Returns:
+        HarvestResult: The candidates
+    """
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(["img", "source"]))
+    candidates: List[Dict[str, Any]] = []
+    for tag in soup.find_all(["img", "source"]):
+        found = None
+        for kind, attributes in (("zoom", ZOOM_ATTRIBUTES), ("srcset", SRCSET_ATTRIBUTES),
+                                 ("src", ["src"]), ("data", LAZY_ATTRIBUTES)):
+            for name in attributes:
+                value = tag.get(name)
+                if kind == "srcset":
+                    value = _largest_from_srcset(value)
+                if value and not value.strip().startswith(("data:", "blob:")):
+                    found = (urljoin(base_url, value.strip()), kind)
+                    break
+            if found:
+                break
+        if found is None:
+            continue
+        candidates.append({
+            "url": found[0],
+            "kind": found[1] if tag.name == "img" else "picture",
+            "width": 0,
+            "height": 0,
+            "natural_width": 0,
+            "natural_height": 0,
+        })
+    return HarvestResult(candidates, time.perf_counter() - start, "html")
+
+
+def harvest_page_images(driver: Any) -> HarvestResult:
+    """
+    Harvest every image candidate on the current page in one script call.
+
+    For each <img> and <picture><source> the preferred URL is the zoom image, then the largest
+    srcset entry, then the current src, then lazy-loading data-* attributes. Falls back to parsing
+    the page source when the script cannot run.
+
+    Args:
+        driver (Any): Selenium driver on the page
+
+    Returns:
+        HarvestResult: The candidates with rendered and natural sizes
+    """
+    start = time.perf_counter()
+    config = {"zoom": ZOOM_ATTRIBUTES, "lazy": LAZY_ATTRIBUTES, "srcset": SRCSET_ATTRIBUTES}
+    try:
+        candidates = driver.execute_script(HARVEST_SCRIPT, config) or []
+        return HarvestResult(candidates, time.perf_counter() - start, "script")
+    except Exception as e:
+        print(f"harvest_page_images: Script harvest failed, parsing page source: {str(e)}")
+        return harvest_from_html(driver.page_source, driver.current_url)
+
+
+# Makes lazy loading eager: images observed by an IntersectionObserver are reported as visible at once,
+# and loading="lazy" is dropped from images present now and added later
+LAZY_LOAD_OVERRIDE_SCRIPT = """
+(() => {
+    if (window.__deltaLazyOverride) return;
+    window.__deltaLazyOverride = true;
+    const eager = root => {
+        if (!root.querySelectorAll) return;
+        for (const img of root.querySelectorAll('img[loading="lazy"], iframe[loading="lazy"]')) img.loading = 'eager';
+    };
+    if (window.IntersectionObserver) {
+        const observe = IntersectionObserver.prototype.observe;
+        IntersectionObserver.prototype.observe = function (target) {
+            observe.call(this, target);
+            const rect = target.getBoundingClientRect();
+            const entry = {target: target, isIntersecting: true, intersectionRatio: 1, time: performance.now(),
+                           boundingClientRect: rect, intersectionRect: rect, rootBounds: null};
+            const callback = this.__deltaCallback;
+            if (callback) setTimeout(() => { try { callback([entry], this); } catch (e) {} }, 0);
+        };
+        const Native = window.IntersectionObserver;
+        window.IntersectionObserver = function (callback, options) {
+            const observer = new Native(callback, options);
+            observer.__deltaCallback = callback;
+            return observer;
+        };
+        window.IntersectionObserver.prototype = Native.prototype;
+    }
+    const start = () => {
+        eager(document);
+        new MutationObserver(mutations => {
+            for (const mutation of mutations) for (const node of mutation.addedNodes) {
+                if (node.tagName === 'IMG' && node.loading === 'lazy') node.loading = 'eager';
+                else eager(node);
+            }
+        }).observe(document.documentElement, {childList: true, subtree: true});
+    };
+    if (document.documentElement) start(); else document.addEventListener('DOMContentLoaded', start);
+})();
+"""
+
+# Hovers gallery thumbnails with synthetic events, so galleries that swap in full-size images on hover do so
+GALLERY_TRIGGER_SCRIPT = """
+const selectors = arguments[0];
+const limit = arguments[1];
+let triggered = 0;
+for (const selector of selectors) {
+    for (const el of document.querySelectorAll(selector)) {
+        if (triggered >= limit) return triggered;
+        for (const type of ['mouseover', 'mouseenter', 'pointerover']) {
+            el.dispatchEvent(new MouseEvent(type, {bubbles: type !== 'mouseenter', cancelable: true, view: window}));
+        }
+        triggered++;
+    }
+}
+return triggered;
+"""
+
+# Counts distinct image URLs currently referenced by the page
+COUNT_SCRIPT = """
+const urls = new Set();
+for (const el of document.querySelectorAll('img, picture source')) {
+    for (const value of [el.currentSrc, el.getAttribute('src'), el.getAttribute('data-src'),
+                         el.getAttribute('srcset'), el.getAttribute('data-srcset'), el.getAttribute('data-zoom-image')]) {
+        if (value && !value.startsWith('data:')) urls.add(value);
+    }
+}
+return urls.size;
+"""
+
+# Scrolls one step down and reports whether the bottom of the page has been reached
+SCROLL_STEP_SCRIPT = """
+const fraction = arguments[0];
+window.scrollBy(0, Math.max(200, Math.floor(window.innerHeight * fraction)));
+const scroller = document.scrollingElement || document.documentElement;
+return window.innerHeight + window.scrollY >= scroller.scrollHeight - 2;
+"""
+
+# Gallery thumbnail containers worth hovering; plain img is deliberately not included
+GALLERY_SELECTORS = [
+    "div.imgTagWrapper img",
+    "img.thumbnail",
+    "div.product-thumbnails img",
+    "div.gallery img",
+    "img[src*='thumb']",
+    "[data-thumb]",
+    "[class*='thumbnail'] img",
+]
+
+
+def install_lazy_load_overrides(driver: Any) -> Optional[str]:
+    """
+    Register the lazy-load override to run before page scripts on every following navigation.
+
+    Args:
+        driver (Any): Selenium Chrome driver
+
+    Returns:
+        Optional[str]: CDP script identifier for remove_lazy_load_overrides, None if CDP is not available
+    """
+    try:
+        return driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument",
+                                      {"source": LAZY_LOAD_OVERRIDE_SCRIPT})["identifier"]
+    except Exception as e:
+        print(f"install_lazy_load_overrides: CDP not available, override will be injected after load: {str(e)}")
+        return None
+
+
+def remove_lazy_load_overrides(driver: Any, identifier: Optional[str]) -> None:
+    """
+    Unregister a lazy-load override installed with install_lazy_load_overrides.
+
+    Args:
+        driver (Any): Selenium Chrome driver
+        identifier (Optional[str]): Identifier returned by install_lazy_load_overrides
+    """
+    if identifier is None:
+        return
+    try:
+        driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+    except Exception as e:
+        print(f"remove_lazy_load_overrides: Error removing override: {str(e)}")
+
+
+def trigger_lazy_images(driver: Any, budget: float, waits: Optional[WaitEngine] = None, step_fraction: float = 0.8,
+                        settle_timeout: float = 0.4, patience: int = 2, gallery_limit: int = 60) -> Dict[str, Any]:
+    """
+    Make lazily loaded images reference their real URLs, within a time budget.
+
+    The override is applied to the current page, gallery thumbnails are hovered with synthetic
+    events, then the page is scrolled a step at a time. After each step the page is given up to
+    settle_timeout to reference new image URLs; scrolling stops once patience consecutive steps
+    bring nothing new, the bottom is reached without new URLs, or the budget runs out.
+
+    Args:
+        driver (Any): Selenium driver on the page
+        budget (float): Maximum seconds to spend on the page
+        waits (Optional[WaitEngine]): Wait engine recording the settle waits (default: a new one)
+        step_fraction (float): Fraction of the viewport height scrolled per step (default: 0.8)
+        settle_timeout (float): Seconds to wait for new URLs after each step (default: 0.4)
+        patience (int): Consecutive steps without new URLs before stopping (default: 2)
+        gallery_limit (int): Maximum thumbnails hovered (default: 60)
+
+    Returns:
+        Dict[str, Any]: Steps taken, URL counts before and after, thumbnails hovered, stop reason and duration
+    """
+    waits = waits or WaitEngine(driver)
+    start = time.perf_counter()
+    deadline = start + budget
+    count = lambda: driver.execute_script(COUNT_SCRIPT)
+
+    driver.execute_script(LAZY_LOAD_OVERRIDE_SCRIPT)
+    initial = count()
+    hovered = driver.execute_script(GALLERY_TRIGGER_SCRIPT, GALLERY_SELECTORS, gallery_limit)
+
+    last = initial
+    steps = 0
+    idle_steps = 0
+    reason = "budget"
+    while time.perf_counter() < deadline:
+        at_bottom = driver.execute_script(SCROLL_STEP_SCRIPT, step_fraction)
+        steps += 1
+        previous = last
+        settle = min(settle_timeout, max(0.0, deadline - time.perf_counter()))
+        grown = waits.until(lambda d: count() > previous, settle, "lazy images settle")
+        last = count()
+        idle_steps = 0 if grown else idle_steps + 1
+        if at_bottom and not grown:
+            reason = "bottom"
+            break
+        if idle_steps >= patience:
+            reason = "no new images"
+            break
+
+    driver.execute_script("window.scrollTo(0, 0)")
+    return {
+        "steps": steps,
+        "urls_before": initial,
+        "urls_after": last,
+        "thumbnails_hovered": hovered,
+        "stopped": reason,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,312 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from downloader import DownloadResult, ImageDownloader
+from similarity import (CandidateImage, ImageHashes, ImageSimilarityComparator, PerceptualPrefilter,
+                        PrefilterResult, PreparedCandidate, ReferenceImage)
+
+# Passed down a queue once per consumer to tell it the upstream stage has finished
+_END = object()
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+
+    def __init__(self, name: str, workers: int) -> None:
+        """
+        Initialize the counters.
+
+        Args:
+            name (str): Stage name
+            workers (int): Number of worker threads in the stage
+        """
+        self.name: str = name
+        self.workers: int = workers
+        self.items_in: int = 0
+        self.items_out: int = 0
+        self.errors: int = 0
+        self.busy_seconds: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, busy_seconds: float, produced: int, failed: bool = False, items: int = 1) -> None:
+        """
+        Record processed items.
+
+        Args:
+            busy_seconds (float): Time spent working on the items
+            produced (int): Number of items passed to the next stage
+            failed (bool): Whether processing raised an error
+            items (int): Number of input items processed (default: 1)
+        """
+        with self._lock:
+            self.items_in += items
+            self.items_out += produced
+            self.busy_seconds += busy_seconds
+            if failed:
+                self.errors += 1
+
+    def summary(self, wall_seconds: float) -> Dict[str, Any]:
+        """
+        Summarize the stage.
+
+        Args:
+            wall_seconds (float): Wall time of the whole pipeline run
+
+        Returns:
+            Dict[str, Any]: Counters, busy time, utilization and throughput in items per second
+        """
+        with self._lock:
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "errors": self.errors,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "utilization": round(self.busy_seconds / (self.workers * wall_seconds), 3) if wall_seconds else 0.0,
+                "items_per_second": round(self.items_in / wall_seconds, 2) if wall_seconds else 0.0,
+            }
+
+
+class PipelineResult:
+    """Outcome of one pipeline run."""
+
+    def __init__(self) -> None:
+        """Initialize an empty result."""
+        self.accepted: List[Tuple[DownloadResult, CandidateImage, Optional[float]]] = []
+        self.prefilter: PrefilterResult = PrefilterResult()
+        self.stages: List[Dict[str, Any]] = []
+        self.wall_seconds: float = 0.0
+
+
+class ImagePipeline:
+    """A staged producer/consumer pipeline: URLs -> download -> decode/preprocess -> batched scoring -> persist.
+
+    Stages run concurrently and are connected by bounded queues, so a slow stage applies
+    backpressure upstream and total latency follows the slowest stage rather than the sum of all stages.
+    """
+
+    def __init__(self, downloader: ImageDownloader, comparator: ImageSimilarityComparator,
+                 prefilter: Optional[PerceptualPrefilter] = None, threshold: float = 0.85, batch_size: int = 16,
+                 queue_size: int = 32, download_workers: int = 8, decode_workers: int = 2,
+                 batch_wait: float = 0.1) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            downloader (ImageDownloader): Streaming downloader used by the download stage
+            comparator (ImageSimilarityComparator): Comparator used for preprocessing and scoring
+            prefilter (Optional[PerceptualPrefilter]): Perceptual-hash prefilter run in the decode stage (default: None)
+            threshold (float): Minimum weighted similarity for a candidate to be accepted (default: 0.85)
+            batch_size (int): Maximum candidates per scoring forward pass (default: 16)
+            queue_size (int): Capacity of each inter-stage queue (default: 32)
+            download_workers (int): Download threads (default: 8)
+            decode_workers (int): Decode/preprocess threads (default: 2)
+            batch_wait (float): Seconds the scorer waits to fill a batch once it has one item (default: 0.1)
+        """
+        self.downloader: ImageDownloader = downloader
+        self.comparator: ImageSimilarityComparator = comparator
+        self.prefilter: Optional[PerceptualPrefilter] = prefilter
+        self.threshold: float = threshold
+        self.batch_size: int = max(1, batch_size)
+        self.queue_size: int = max(1, queue_size)
+        self.download_workers: int = max(1, download_workers)
+        self.decode_workers: int = max(1, decode_workers)
+        self.batch_wait: float = batch_wait
+
+    def run(self, urls: Sequence[str], reference: ReferenceImage,
+            persist: Callable[[DownloadResult, CandidateImage, Optional[float]], None],
+            cancel: Optional[threading.Event] = None) -> PipelineResult:
+        """
+        Push URLs through every stage and wait for the pipeline to drain.
+
+        Args:
+            urls (Sequence[str]): Candidate image URLs
+            reference (ReferenceImage): Query reference the candidates are scored against
+            persist (Callable[[DownloadResult, CandidateImage, Optional[float]], None]): Called once per accepted
+                candidate with its similarity score, or None when the prefilter accepted it without scoring
+            cancel (Optional[threading.Event]): When set, remaining URLs are dropped and the pipeline drains early
+
+        Returns:
+            PipelineResult: Accepted candidates in URL order, prefilter buckets and per-stage counters
+        """
+        result = PipelineResult()
+        url_queue: queue.Queue = queue.Queue(self.queue_size)
+        download_queue: queue.Queue = queue.Queue(self.queue_size)
+        score_queue: queue.Queue = queue.Queue(self.queue_size)
+        persist_queue: queue.Queue = queue.Queue(self.queue_size)
+
+        download_stats = StageStats("download", self.download_workers)
+        decode_stats = StageStats("decode", self.decode_workers)
+        score_stats = StageStats("score", 1)
+        persist_stats = StageStats("persist", 1)
+
+        kept_hashes: List[ImageHashes] = []
+        prefilter_lock = threading.Lock()
+        accepted_lock = threading.Lock()
+
+        def download(item: Tuple[int, str]) -> List[Any]:
+            if cancel is not None and cancel.is_set():
+                return []
+            fetched = self.downloader.fetch(item[1], item[0])
+            if not fetched.ok:
+                if not fetched.skipped:
+                    print(f"ImagePipeline: Error downloading image {item[0] + 1} from {item[1]}: {fetched.error}")
+                return []
+            return [fetched]
+
+        def decode(fetched: DownloadResult) -> List[Any]:
+            candidate = CandidateImage(fetched.data, fetched.url)
+            bucket = "to_score"
+            if self.prefilter is not None:
+                try:
+                    hashes = ImageHashes.from_image(candidate)
+                    with prefilter_lock:
+                        bucket = self.prefilter.classify(hashes, reference.hashes, kept_hashes)
+                except Exception as e:
+                    print(f"ImagePipeline: Error hashing {fetched.url}: {str(e)}")
+            with prefilter_lock:
+                result.prefilter.add(bucket, candidate)
+
+            if bucket == "accepted":
+                candidate.release_pixels()
+                # Never scored by CLIP; None keeps it from passing for a similarity score
+                return [("persist", fetched, candidate, None)]
+            if bucket != "to_score":
+                return []
+            prepared = self.comparator.prepare_candidate(candidate)
+            candidate.release_pixels()
+            return [(fetched, candidate, prepared)]
+
+        def write(item: Tuple[str, DownloadResult, CandidateImage, Optional[float]]) -> List[Any]:
+            _, fetched, candidate, score = item
+            persist(fetched, candidate, score)
+            with accepted_lock:
+                result.accepted.append((fetched, candidate, score))
+            return []
+
+        start = time.perf_counter()
+        threads: List[threading.Thread] = []
+        threads += self._start_stage(download_stats, url_queue, download_queue, download, self.decode_workers)
+        threads += self._start_stage(decode_stats, download_queue, score_queue, decode, 1,
+                                     bypass_queue=persist_queue)
+        threads.append(self._start_thread("score", self._score_worker,
+                                          score_queue, persist_queue, reference, score_stats))
+        threads += self._start_stage(persist_stats, persist_queue, None, write, 0)
+
+        for item in enumerate(urls):
+            if cancel is not None and cancel.is_set():
+                break
+            url_queue.put(item)
+        for _ in range(self.download_workers):
+            url_queue.put(_END)
+
+        for thread in threads:
+            thread.join()
+
+        result.wall_seconds = time.perf_counter() - start
+        result.accepted.sort(key=lambda entry: entry[0].index)
+        result.stages = [stats.summary(result.wall_seconds)
+                         for stats in (download_stats, decode_stats, score_stats, persist_stats)]
+        return result
+
+    @staticmethod
+    def _start_thread(name: str, target: Callable, *args: Any) -> threading.Thread:
+        """Start a daemon worker thread."""
+        thread = threading.Thread(target=target, args=args, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _start_stage(self, stats: StageStats, in_queue: queue.Queue, out_queue: Optional[queue.Queue],
+                     work: Callable[[Any], List[Any]], downstream_consumers: int,
+                     bypass_queue: Optional[queue.Queue] = None) -> List[threading.Thread]:
+        """
+        Start the workers of one stage plus a closer that signals the next stage once they all finish.
+
+        Args:
+            stats (StageStats): Counters for the stage
+            in_queue (queue.Queue): Queue the workers consume from
+            out_queue (Optional[queue.Queue]): Queue the workers produce into
+            work (Callable[[Any], List[Any]]): Turns one input item into zero or more output items
+            downstream_consumers (int): Number of end markers to send on out_queue when the stage is done
+            bypass_queue (Optional[queue.Queue]): Queue for output items tagged "persist", skipping the next stage
+
+        Returns:
+            List[threading.Thread]: The worker threads and the closer thread
+        """
+        def worker() -> None:
+            while True:
+                item = in_queue.get()
+                if item is _END:
+                    return
+                began = time.perf_counter()
+                try:
+                    produced = work(item)
+                    failed = False
+                except Exception as e:
+                    print(f"ImagePipeline: Error in {stats.name} stage: {str(e)}")
+                    produced, failed = [], True
+                stats.record(time.perf_counter() - began, len(produced), failed)
+                for output in produced:
+                    if bypass_queue is not None and output[0] == "persist":
+                        bypass_queue.put(output)
+                    elif out_queue is not None:
+                        out_queue.put(output)
+
+        workers = [self._start_thread(stats.name, worker) for _ in range(stats.workers)]
+
+        def closer() -> None:
+            for thread in workers:
+                thread.join()
+            if out_queue is not None:
+                for _ in range(downstream_consumers):
+                    out_queue.put(_END)
+
+        return workers + [self._start_thread(f"{stats.name}-closer", closer)]
+
+    def _score_worker(self, score_queue: queue.Queue, persist_queue: queue.Queue,
+                      reference: ReferenceImage, stats: StageStats) -> None:
+        """
+        Collect prepared candidates into batches, score each batch in one forward pass and forward accepted ones.
+
+        Args:
+            score_queue (queue.Queue): Prepared candidates from the decode stage
+            persist_queue (queue.Queue): Queue of accepted candidates for the persist stage
+            reference (ReferenceImage): Query reference
+            stats (StageStats): Counters for the stage
+        """
+        finished = False
+        while not finished:
+            batch: List[Tuple[DownloadResult, CandidateImage, PreparedCandidate]] = []
+            item = score_queue.get()
+            if item is _END:
+                finished = True
+            else:
+                batch.append(item)
+                deadline = time.perf_counter() + self.batch_wait
+                while len(batch) < self.batch_size:
+                    try:
+                        item = score_queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                    except queue.Empty:
+                        break
+                    if item is _END:
+                        finished = True
+                        break
+                    batch.append(item)
+
+            if batch:
+                began = time.perf_counter()
+                try:
+                    scores = self.comparator.score_prepared(reference, [entry[2] for entry in batch]).tolist()
+                    failed = False
+                except Exception as e:
+                    print(f"ImagePipeline: Error scoring batch of {len(batch)}: {str(e)}")
+                    scores, failed = [], True
+                accepted = [(fetched, candidate, score) for (fetched, candidate, _), score in zip(batch, scores)
+                            if score >= self.threshold]
+                stats.record(time.perf_counter() - began, len(accepted), failed, items=len(batch))
+                for fetched, candidate, score in accepted:
+                    persist_queue.put(("persist", fetched, candidate, score))
+
+        persist_queue.put(_END)
@@ -0,0 +1,43 @@
+from typing import Any, Dict, List
+
+# URL patterns (CDP wildcard syntax) blocked in each phase. Blocked images still keep their
+# src/srcset attributes in the DOM; candidate images are downloaded separately by ImageDownloader.
+_IMAGES = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.bmp", "*.ico", "*.svg",
+           "*.jpg?*", "*.jpeg?*", "*.png?*", "*.gif?*", "*.webp?*", "*.avif?*"]
+_MEDIA = ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*.mov", "*.mp4?*", "*.webm?*"]
+_FONTS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.woff?*", "*.woff2?*", "*fonts.googleapis.com*",
+          "*fonts.gstatic.com*"]
+_THIRD_PARTY = ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+                "*connect.facebook.com*", "*hotjar.com*", "*criteo.com*", "*taboola.com*", "*outbrain.com*",
+                "*scorecardresearch.com*", "*clarity.ms*", "*tiktok.com/i18n/pixel*", "*bat.bing.com*",
+                "*amazon-adsystem.com*", "*adsrvr.org*", "*youtube.com/embed*"]
+
+RESOURCE_PROFILES: Dict[str, List[str]] = {
+    # Google result pages: the upload flow and result extraction only need the DOM and Google's own scripts
+    "search": _IMAGES + _MEDIA + _FONTS,
+    # Product pages: gallery scripts must still run, but trackers, ads, media and fonts are dropped
+    "product": _IMAGES + _MEDIA + _FONTS + _THIRD_PARTY,
+    "none": [],
+}
+
+
+def apply_resource_profile(driver: Any, profile: str) -> bool:
+    """
+    Block the resource types of a profile for all following requests of a Chrome driver.
+
+    Args:
+        driver (Any): Selenium Chrome driver
+        profile (str): Key of RESOURCE_PROFILES ("search", "product" or "none")
+
+    Returns:
+        bool: True if the policy was applied, False if CDP is not available
+    """
+    if profile not in RESOURCE_PROFILES:
+        raise ValueError(f"Unknown resource profile: {profile}")
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": RESOURCE_PROFILES[profile]})
+        return True
+    except Exception as e:
+        print(f"apply_resource_profile: Could not apply {profile} profile: {str(e)}")
+        return False
@@ -0,0 +1,194 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from similarity import hamming_distance
+
+
+class ResultCache:
+    """A persistent cache of whole search results, keyed by the query image fingerprint.
+
+    An entry is found by the SHA-256 of the query bytes, or failing that by the closest
+    perceptual hash within max_distance bits, so re-submitting a re-encoded or resized copy of the
+    same photo is also a hit. Accepted image files are copied next to the database so a hit does
+    not depend on the (cleared-per-search) output folder. Entries expire after ttl seconds and the
+    least recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 200, ttl: float = 24 * 3600, max_distance: int = 4) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path (str): Path of the SQLite database file; image files are stored in a folder beside it
+            max_entries (int): Maximum number of cached searches (default: 200)
+            ttl (float): Seconds a cached search stays fresh (default: 24 hours)
+            max_distance (int): Maximum pHash Hamming distance for a near-duplicate hit (default: 4)
+        """
+        folder = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.db_path: str = db_path
+        self.files_dir: str = os.path.join(folder, "result_images")
+        self.max_entries: int = max(1, max_entries)
+        self.ttl: float = ttl
+        self.max_distance: int = max_distance
+        self.hits: int = 0
+        self.near_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                phash TEXT NOT NULL,
+                search_limit INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                files TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(digest: str, search_limit: int) -> str:
+        """
+        Build the cache key of a search.
+
+        Args:
+            digest (str): Content hash of the query image bytes
+            search_limit (int): Number of search results the search scraped
+
+        Returns:
+            str: The cache key
+        """
+        return f"{search_limit}|{digest}"
+
+    def _remove(self, keys: List[str]) -> None:
+        """Delete entries and their image files. Caller must hold the lock."""
+        for key in keys:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            shutil.rmtree(os.path.join(self.files_dir, key.replace("|", "_")), ignore_errors=True)
+
+    def get(self, digest: str, phash: int, search_limit: int) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Look up a fresh cached search for a query image.
+
+        Args:
+            digest (str): Content hash of the query image bytes
+            phash (int): 64-bit perceptual hash of the query image
+            search_limit (int): Number of search results requested
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], List[str]]]: Stored response payload and paths of the cached image files, None on a miss or when any of the files is gone
+        """
+        now = time.time()
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT key FROM results WHERE created < ?", (now - self.ttl,))]
+            self._remove(expired)
+
+            key = self.make_key(digest, search_limit)
+            near = False
+            row = self._conn.execute("SELECT key, payload, files FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                # Near-duplicate: the closest perceptual hash among entries for the same limit
+                best = None
+                for candidate in self._conn.execute(
+                        "SELECT key, payload, files, phash FROM results WHERE search_limit = ?", (search_limit,)):
+                    distance = hamming_distance(phash, int(candidate[3], 16))
+                    if distance <= self.max_distance and (best is None or distance < best[0]):
+                        best = (distance, candidate[:3])
+                if best is not None:
+                    row = best[1]
+                    near = True
+
+            # An entry whose image files were deleted cannot be replayed; drop it and search again
+            files = json.loads(row[2]) if row is not None else []
+            if row is not None and not all(os.path.exists(path) for path in files):
+                self._remove([row[0]])
+                row = None
+
+            if row is None:
+                self.misses += 1
+                self._conn.commit()
+                return None
+            self.hits += 1
+            if near:
+                self.near_hits += 1
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, row[0]))
+            self._conn.commit()
+
+        return json.loads(row[1]), files
+
+    def put(self, digest: str, phash: int, search_limit: int, payload: Dict[str, Any], files: List[str]) -> None:
+        """
+        Store a search result, copying its image files into the cache.
+
+        Args:
+            digest (str): Content hash of the query image bytes
+            phash (int): 64-bit perceptual hash of the query image
+            search_limit (int): Number of search results the search scraped
+            payload (Dict[str, Any]): JSON-serializable response to return on a hit
+            files (List[str]): Accepted image files, in response order
+        """
+        key = self.make_key(digest, search_limit)
+        folder = os.path.join(self.files_dir, key.replace("|", "_"))
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+        stored = []
+        for path in files:
+            target = os.path.join(folder, os.path.basename(path))
+            shutil.copyfile(path, target)
+            stored.append(target)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, digest, phash, search_limit, payload, files, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, digest, format(phash, "016x"), search_limit, json.dumps(payload), json.dumps(stored), now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                evicted = [row[0] for row in self._conn.execute(
+                    "SELECT key FROM results ORDER BY last_access ASC LIMIT ?", (excess,))]
+                self._remove(evicted)
+                self.evictions += excess
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits (of which near-duplicate), misses, evictions, hit rate and current number of entries
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_duplicate_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
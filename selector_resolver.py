@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from waits import WaitEngine
+
+# Evaluates the candidate XPaths in one round trip and returns [index, element] for the usable match that comes
+# earliest in the default order: candidates are tried in learned order, and once one matches, only candidates
+# ranked before it by default are checked as well, so a broad fallback never beats a specific selector that matches
+RESOLVE_SCRIPT = """
+const candidates = arguments[0];
+const requireVisible = arguments[1];
+const requiredWords = arguments[2] || [];
+const defaultRanks = arguments[3];
+function firstUsable(xpath) {
+    let snapshot;
+    try {
+        snapshot = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    } catch (e) {
+        return null;
+    }
+    for (let j = 0; j < snapshot.snapshotLength; j++) {
+        const el = snapshot.snapshotItem(j);
+        if (!(el instanceof Element)) continue;
+        if (requireVisible) {
+            const rect = el.getBoundingClientRect();
+            const style = window.getComputedStyle(el);
+            if (rect.width === 0 || rect.height === 0 || style.visibility === 'hidden' || style.display === 'none') continue;
+            if (el.disabled || el.getAttribute('aria-disabled') === 'true') continue;
+        }
+        if (requiredWords.length) {
+            const text = (el.innerText || el.textContent || '').toLowerCase();
+            if (!requiredWords.every(word => text.includes(word))) continue;
+        }
+        return el;
+    }
+    return null;
+}
+for (let i = 0; i < candidates.length; i++) {
+    const el = firstUsable(candidates[i]);
+    if (!el) continue;
+    let best = [i, el];
+    for (let k = i + 1; k < candidates.length; k++) {
+        if (defaultRanks[k] >= defaultRanks[best[0]]) continue;
+        const earlier = firstUsable(candidates[k]);
+        if (earlier) best = [k, earlier];
+    }
+    return best;
+}
+return null;
+"""
+
+
+class SelectorResolver:
+    """Resolves a list of candidate XPaths in a single script call, trying the selectors that worked before first.
+
+    Hit statistics are kept per selector group and persisted to a JSON file, so the ordering
+    learned in one run carries over to the next.
+    """
+
+    def __init__(self, stats_path: Optional[str] = None) -> None:
+        """
+        Initialize the resolver.
+
+        Args:
+            stats_path (Optional[str]): JSON file for the hit statistics, None to keep them in memory only
+        """
+        self.stats_path: Optional[str] = stats_path
+        self._lock: threading.Lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict[str, float]]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Read persisted statistics, starting fresh if the file is missing or corrupt."""
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"SelectorResolver: Error reading selector stats from {self.stats_path}: {str(e)}")
+            return {}
+
+    def _save(self) -> None:
+        """Write the statistics atomically. Caller must hold the lock."""
+        if not self.stats_path:
+            return
+        try:
+            folder = os.path.dirname(os.path.abspath(self.stats_path))
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+            temp_path = f"{self.stats_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._stats, f, indent=2)
+            os.replace(temp_path, self.stats_path)
+        except Exception as e:
+            print(f"SelectorResolver: Error writing selector stats to {self.stats_path}: {str(e)}")
+
+    def ordered(self, group: str, selectors: Sequence[str]) -> List[str]:
+        """
+        Order selectors so the most recently successful one comes first, then by hit count.
+
+        The order only decides which selectors are tried first; resolve() still returns the match
+        that comes earliest in the default order.
+
+        Args:
+            group (str): Name of the selector group
+            selectors (Sequence[str]): Candidate selectors in their default order
+
+        Returns:
+            List[str]: The selectors in learned order; unseen selectors keep their default order
+        """
+        with self._lock:
+            group_stats = dict(self._stats.get(group, {}))
+        position = {selector: index for index, selector in enumerate(selectors)}
+
+        def rank(selector: str) -> tuple:
+            entry = group_stats.get(selector, {})
+            return (-entry.get("last_hit", 0.0), -entry.get("hits", 0), position[selector])
+
+        return sorted(selectors, key=rank)
+
+    def record_hit(self, group: str, selector: str) -> None:
+        """
+        Record that a selector resolved an element.
+
+        Args:
+            group (str): Name of the selector group
+            selector (str): The selector that matched
+        """
+        with self._lock:
+            entry = self._stats.setdefault(group, {}).setdefault(selector, {"hits": 0, "last_hit": 0.0})
+            entry["hits"] += 1
+            entry["last_hit"] = time.time()
+            self._save()
+
+    def resolve(self, driver: Any, group: str, selectors: Sequence[str], timeout: float,
+                require_visible: bool = True, required_words: Optional[Sequence[str]] = None,
+                waits: Optional[WaitEngine] = None) -> Any:
+        """
+        Find a usable element among candidate XPaths, polling under one shared deadline.
+
+        Of the selectors matching at the same time, the one listed first in selectors wins, so a
+        broad fallback that once matched cannot displace the specific selectors for good.
+
+        Args:
+            driver (Any): Selenium driver
+            group (str): Name of the selector group, used for the learned ordering
+            selectors (Sequence[str]): Candidate XPaths
+            timeout (float): Shared deadline in seconds for the whole list
+            require_visible (bool): Only accept visible, enabled elements (default: True)
+            required_words (Optional[Sequence[str]]): Lower-case words the element text must contain (default: None)
+            waits (Optional[WaitEngine]): Wait engine recording the timing (default: a new one)
+
+        Returns:
+            Any: The matched WebElement, None if nothing matched before the deadline
+        """
+        waits = waits or WaitEngine(driver)
+        candidates = self.ordered(group, selectors)
+        position = {selector: index for index, selector in enumerate(selectors)}
+        default_ranks = [position[selector] for selector in candidates]
+        words = [word.lower() for word in (required_words or [])]
+
+        match = waits.until(
+            lambda d: d.execute_script(RESOLVE_SCRIPT, candidates, require_visible, words, default_ranks),
+            timeout, f"resolve {group}"
+        )
+        if not match:
+            print(f"SelectorResolver: No match for {group} among {len(candidates)} selectors within {timeout}s")
+            return None
+
+        index, element = match
+        self.record_hit(group, candidates[index])
+        return element
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Return a copy of the per-selector hit statistics.
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, float]]]: Hits and last hit time per selector, per group
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
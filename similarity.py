@@ -1,40 +1,605 @@
-import torch
-import clip
+from __future__ import annotations
 from PIL import Image
-import cv2
-from typing import Optional
+import io
+import os
+import time
+import threading
+import psutil
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from embedding_cache import EmbeddingCache, content_hash
+from lazy_imports import LazyModule
+
+# Imported on first use, so importing this module (and the UI) does not wait for them
+torch = LazyModule("torch")
+clip = LazyModule("clip")
+cv2 = LazyModule("cv2")
+
+# Bump whenever load_edge_image/load_raw_image change, so cached embeddings are not reused
+PREPROCESS_VERSION: str = "canny-100-200/v2"
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """
+    Resolve the device a model should run on.
+
+    Args:
+        device (Optional[str]): Requested device (default: cuda if available, else cpu)
+
+    Returns:
+        str: The device name
+    """
+    return device if device else ("cuda" if torch.cuda.is_available() else "cpu")
+
+
+class ModelRegistry:
+    """A process-wide, thread-safe registry that loads each CLIP model once per (model_name, device) pair."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock: threading.Lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._models: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def get(self, model_name: str = "ViT-B/32", device: Optional[str] = None) -> Tuple[Any, Any]:
+        """
+        Return the (model, preprocess) pair for a model, loading it on first use.
+        
+        Concurrent callers asking for the same pair wait for a single load instead of loading it twice.
+        
+        Args:
+            model_name (str): Name of the CLIP model to use (default: ViT-B/32)
+            device (Optional[str]): Device to run the model on (default: cuda if available, else cpu)
+            
+        Returns:
+            Tuple[Any, Any]: The CLIP model and its preprocessing transform
+        """
+        key = (model_name, resolve_device(device))
+        with self._lock:
+            if key in self._models:
+                self._stats[key]["hits"] += 1
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._stats[key]["hits"] += 1
+                    return self._models[key]
+            
+            rss_before = self._resident_memory_mb()
+            start = time.perf_counter()
+            model, preprocess = clip.load(key[0], device=key[1])
+            model.eval()
+            load_seconds = time.perf_counter() - start
+            rss_after = self._resident_memory_mb()
+            
+            with self._lock:
+                self._models[key] = (model, preprocess)
+                self._stats[key] = {
+                    "model_name": key[0],
+                    "device": key[1],
+                    "load_seconds": round(load_seconds, 3),
+                    "rss_before_mb": rss_before,
+                    "rss_after_mb": rss_after,
+                    "rss_delta_mb": round(rss_after - rss_before, 1),
+                    "hits": 0,
+                }
+            print(f"ModelRegistry: Loaded {key[0]} on {key[1]} in {load_seconds:.2f}s "
+                  f"(RSS {rss_before:.0f} MB -> {rss_after:.0f} MB)")
+            return model, preprocess
+
+    def is_loaded(self, model_name: str = "ViT-B/32", device: Optional[str] = None) -> bool:
+        """
+        Check whether a model has already been loaded.
+        
+        Args:
+            model_name (str): Name of the CLIP model
+            device (Optional[str]): Device the model runs on (default: cuda if available, else cpu)
+            
+        Returns:
+            bool: True if the model is resident in this process
+        """
+        with self._lock:
+            return (model_name, resolve_device(device)) in self._models
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Report load time and memory usage for every loaded model.
+        
+        Returns:
+            List[Dict[str, Any]]: One entry per loaded model, plus the current process RSS
+        """
+        rss_now = self._resident_memory_mb()
+        with self._lock:
+            return [dict(entry, rss_current_mb=rss_now) for entry in self._stats.values()]
+
+    @staticmethod
+    def _resident_memory_mb() -> float:
+        """Return the resident set size of this process in megabytes."""
+        return round(psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024), 1)
+
+
+# Shared by every comparator in the process
+MODEL_REGISTRY: ModelRegistry = ModelRegistry()
+
+_comparators: Dict[Tuple[str, str], "ImageSimilarityComparator"] = {}
+_comparators_lock: threading.Lock = threading.Lock()
+
+
+def get_shared_comparator(model_name: str = "ViT-B/32", device: Optional[str] = None, cache: Optional[EmbeddingCache] = None) -> "ImageSimilarityComparator":
+    """
+    Return the process-wide comparator for a model, creating it on first use.
+    
+    Args:
+        model_name (str): Name of the CLIP model to use (default: ViT-B/32)
+        device (Optional[str]): Device to run the model on (default: cuda if available, else cpu)
+        cache (Optional[EmbeddingCache]): Embedding cache to attach to the comparator, if any
+        
+    Returns:
+        ImageSimilarityComparator: A comparator backed by the shared model registry
+    """
+    key = (model_name, resolve_device(device))
+    with _comparators_lock:
+        comparator = _comparators.get(key)
+        if comparator is None:
+            comparator = ImageSimilarityComparator(model_name, key[1], cache)
+            _comparators[key] = comparator
+        elif cache is not None:
+            comparator.cache = cache
+        return comparator
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """
+    Decode encoded image bytes into an RGB pixel array.
+    
+    Args:
+        data (bytes): Encoded image (JPEG, PNG, WebP, GIF, ...)
+        
+    Returns:
+        np.ndarray: uint8 array of shape (height, width, 3)
+    """
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is not None:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    
+    # Formats OpenCV cannot decode (e.g. GIF) go through PIL
+    try:
+        with Image.open(io.BytesIO(data)) as pil_img:
+            return np.asarray(pil_img.convert("RGB"))
+    except Exception as e:
+        raise ValueError(f"Could not decode image data: {str(e)}")
+
+
+class CandidateImage:
+    """An image held in memory and decoded at most once, shared by the hashing, edge and raw branches."""
+
+    def __init__(self, data: bytes, source: str = "") -> None:
+        """
+        Initialize the candidate.
+        
+        Args:
+            data (bytes): Encoded image bytes
+            source (str): Where the bytes came from (URL or path), used in messages
+        """
+        self.data: bytes = data
+        self.source: str = source
+        self._digest: Optional[str] = None
+        self._pixels: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_path(cls, path: str) -> "CandidateImage":
+        """
+        Read an image file into memory.
+        
+        Args:
+            path (str): Path to the image file
+            
+        Returns:
+            CandidateImage: The candidate
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Could not load image at {path}")
+        with open(path, "rb") as f:
+            return cls(f.read(), path)
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the encoded bytes."""
+        if self._digest is None:
+            self._digest = content_hash(self.data)
+        return self._digest
+
+    @property
+    def pixels(self) -> np.ndarray:
+        """Decoded RGB pixels, decoded on first access."""
+        if self._pixels is None:
+            self._pixels = decode_image(self.data)
+        return self._pixels
+
+    def release_pixels(self) -> None:
+        """Drop the decoded pixels to free memory once scoring is done."""
+        self._pixels = None
+
+
+# Either a path on disk or an in-memory candidate
+ImageInput = Union[str, CandidateImage]
+
+
+def as_candidate(image: ImageInput) -> CandidateImage:
+    """
+    Normalize an image input to a CandidateImage.
+    
+    Args:
+        image (ImageInput): Path to an image file or an in-memory candidate
+        
+    Returns:
+        CandidateImage: The in-memory candidate
+    """
+    return image if isinstance(image, CandidateImage) else CandidateImage.from_path(image)
+
+
+def _grayscale_thumbnail(image: Image.Image, width: int, height: int) -> np.ndarray:
+    """
+    Downscale an image to a small grayscale array for hashing.
+    
+    Args:
+        image (Image.Image): Source image
+        width (int): Target width in pixels
+        height (int): Target height in pixels
+        
+    Returns:
+        np.ndarray: Float array of shape (height, width)
+    """
+    return np.asarray(image.convert("L").resize((width, height), Image.LANCZOS), dtype=np.float64)
+
+
+# Images are box-reduced to about this shorter side once before hashing; the hash thumbnails are at most 32px
+HASH_INTERMEDIATE_EDGE = 128
+
+
+def _hash_source(image: Image.Image) -> Image.Image:
+    """
+    Shrink an image once to a small grayscale intermediate that every hash thumbnail is resized from.
+    
+    Args:
+        image (Image.Image): Source image
+        
+    Returns:
+        Image.Image: Grayscale image whose shorter side is at least HASH_INTERMEDIATE_EDGE (if the source was)
+    """
+    factor = min(image.width, image.height) // HASH_INTERMEDIATE_EDGE
+    if factor > 1:
+        image = image.reduce(factor)
+    return image.convert("L")
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """Pack a boolean array into an integer hash, most significant bit first."""
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def average_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the average hash (aHash): each pixel of a hash_size x hash_size thumbnail compared to the mean.
+    
+    Args:
+        image (Image.Image): Source image
+        hash_size (int): Side of the hash grid (default: 8, giving a 64-bit hash)
+        
+    Returns:
+        int: The hash
+    """
+    pixels = _grayscale_thumbnail(image, hash_size, hash_size)
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash (dHash): horizontal gradient signs of a (hash_size + 1) x hash_size thumbnail.
+    
+    Args:
+        image (Image.Image): Source image
+        hash_size (int): Side of the hash grid (default: 8, giving a 64-bit hash)
+        
+    Returns:
+        int: The hash
+    """
+    pixels = _grayscale_thumbnail(image, hash_size + 1, hash_size)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Return the orthonormal DCT-II basis matrix of the given size."""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0, :] /= np.sqrt(2.0)
+    return matrix
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """
+    Compute the perceptual hash (pHash): low-frequency DCT coefficients compared to their median.
+    
+    Args:
+        image (Image.Image): Source image
+        hash_size (int): Side of the hash grid (default: 8, giving a 64-bit hash)
+        highfreq_factor (int): Thumbnail side as a multiple of hash_size (default: 4)
+        
+    Returns:
+        int: The hash
+    """
+    size = hash_size * highfreq_factor
+    pixels = _grayscale_thumbnail(image, size, size)
+    basis = _dct_matrix(size)
+    low_frequencies = (basis @ pixels @ basis.T)[:hash_size, :hash_size]
+    # The DC term only carries overall brightness, so it is left out of the median
+    return _bits_to_int(low_frequencies > np.median(low_frequencies.ravel()[1:]))
+
+
+def hamming_distance(hash1: int, hash2: int) -> int:
+    """
+    Count the differing bits between two hashes.
+    
+    Args:
+        hash1 (int): First hash
+        hash2 (int): Second hash
+        
+    Returns:
+        int: Number of differing bits
+    """
+    return bin(hash1 ^ hash2).count("1")
+
+
+class ImageHashes:
+    """Perceptual hashes and cheap shape statistics of one image."""
+
+    def __init__(self, image: Image.Image) -> None:
+        """
+        Compute every hash of an image.
+        
+        Args:
+            image (Image.Image): Source image
+        """
+        self.width: int = image.width
+        self.height: int = image.height
+        # Full-resolution images are reduced and converted once instead of once per hash
+        source = _hash_source(image)
+        self.ahash: int = average_hash(source)
+        self.dhash: int = difference_hash(source)
+        self.phash: int = perceptual_hash(source)
+        self.contrast: float = float(_grayscale_thumbnail(source, 32, 32).std())
+
+    @classmethod
+    def from_image(cls, image: ImageInput) -> "ImageHashes":
+        """
+        Compute the hashes of an image file or in-memory candidate.
+        
+        Args:
+            image (ImageInput): Path to the image file or an in-memory candidate
+            
+        Returns:
+            ImageHashes: The hashes
+        """
+        return cls(Image.fromarray(as_candidate(image).pixels))
+
+    def distances(self, other: "ImageHashes") -> Tuple[int, int]:
+        """
+        Hamming distances to another image across dHash and pHash.
+        
+        Args:
+            other (ImageHashes): Hashes of the other image
+            
+        Returns:
+            Tuple[int, int]: The smaller and the larger of the two distances
+        """
+        dhash_distance = hamming_distance(self.dhash, other.dhash)
+        phash_distance = hamming_distance(self.phash, other.phash)
+        return min(dhash_distance, phash_distance), max(dhash_distance, phash_distance)
+
+    @property
+    def aspect_ratio(self) -> float:
+        """Ratio of the longer side to the shorter side."""
+        return max(self.width, self.height) / max(1, min(self.width, self.height))
+
+
+class PrefilterResult:
+    """Outcome of running candidates through the perceptual-hash prefilter."""
+
+    def __init__(self) -> None:
+        """Initialize empty candidate buckets."""
+        self.accepted: List[ImageInput] = []
+        self.rejected: List[ImageInput] = []
+        self.duplicates: List[ImageInput] = []
+        self.to_score: List[ImageInput] = []
+
+    def add(self, bucket: str, candidate: ImageInput) -> None:
+        """
+        Append a candidate to a bucket.
+        
+        Args:
+            bucket (str): One of "accepted", "rejected", "duplicates" or "to_score"
+            candidate (ImageInput): The candidate
+        """
+        getattr(self, bucket).append(candidate)
+
+    @property
+    def clip_calls_saved(self) -> int:
+        """Number of candidates that no longer need a CLIP forward pass."""
+        return len(self.accepted) + len(self.rejected) + len(self.duplicates)
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Summarize the bucket sizes.
+        
+        Returns:
+            Dict[str, int]: Counts per bucket and the CLIP calls saved
+        """
+        return {
+            "accepted": len(self.accepted),
+            "rejected": len(self.rejected),
+            "duplicates": len(self.duplicates),
+            "to_score": len(self.to_score),
+            "clip_calls_saved": self.clip_calls_saved,
+        }
+
+
+class PerceptualPrefilter:
+    """A cheap perceptual-hash stage that settles obvious matches, non-matches and duplicates before CLIP scoring."""
+
+    def __init__(self, accept_distance: int = 4, reject_distance: int = 36, dedupe_distance: int = 3,
+                 max_aspect_ratio: float = 4.0, min_contrast: float = 4.0) -> None:
+        """
+        Initialize the prefilter thresholds.
+        
+        Args:
+            accept_distance (int): Candidates within this Hamming distance of the query are accepted outright (default: 4)
+            reject_distance (int): Candidates at least this far from the query are rejected outright (default: 36)
+            dedupe_distance (int): Candidates within this distance of an earlier candidate are dropped as duplicates (default: 3)
+            max_aspect_ratio (float): Wider or taller images, such as banners and sprites, are rejected (default: 4.0)
+            min_contrast (float): Nearly flat images, such as spacers and placeholders, are rejected (default: 4.0)
+        """
+        self.accept_distance: int = accept_distance
+        self.reject_distance: int = reject_distance
+        self.dedupe_distance: int = dedupe_distance
+        self.max_aspect_ratio: float = max_aspect_ratio
+        self.min_contrast: float = min_contrast
+
+    def classify(self, hashes: ImageHashes, reference_hashes: Optional[ImageHashes], kept: List[ImageHashes]) -> str:
+        """
+        Decide which bucket one candidate belongs to.
+        
+        Args:
+            hashes (ImageHashes): Hashes of the candidate
+            reference_hashes (Optional[ImageHashes]): Hashes of the query image; without them only deduplication runs
+            kept (List[ImageHashes]): Hashes of earlier non-duplicate candidates; the candidate is appended if it is not a duplicate
+            
+        Returns:
+            str: One of "accepted", "rejected", "duplicates" or "to_score"
+        """
+        if any(hashes.distances(previous)[1] <= self.dedupe_distance for previous in kept):
+            return "duplicates"
+        kept.append(hashes)
+        
+        if hashes.aspect_ratio > self.max_aspect_ratio or hashes.contrast < self.min_contrast:
+            return "rejected"
+        if reference_hashes is None:
+            return "to_score"
+        
+        nearest, farthest = hashes.distances(reference_hashes)
+        # Accept only when both hashes agree, reject only when both are far off
+        if farthest <= self.accept_distance:
+            return "accepted"
+        if nearest >= self.reject_distance:
+            return "rejected"
+        return "to_score"
+
+    def run(self, reference_hashes: Optional[ImageHashes], candidates: Sequence[ImageInput]) -> PrefilterResult:
+        """
+        Split candidates into accepted, rejected, duplicate and still-to-score buckets.
+        
+        Args:
+            reference_hashes (Optional[ImageHashes]): Hashes of the query image; without them only deduplication runs
+            candidates (Sequence[ImageInput]): Paths to the candidate images or in-memory candidates
+            
+        Returns:
+            PrefilterResult: The buckets, in candidate order
+        """
+        result = PrefilterResult()
+        kept: List[ImageHashes] = []
+        
+        for candidate in candidates:
+            try:
+                hashes = ImageHashes.from_image(candidate)
+            except Exception as e:
+                # Let CLIP scoring report unreadable images
+                source = candidate.source if isinstance(candidate, CandidateImage) else candidate
+                print(f"PerceptualPrefilter: Error hashing {source}: {str(e)}")
+                result.add("to_score", candidate)
+                continue
+            result.add(self.classify(hashes, reference_hashes, kept), candidate)
+        
+        return result
+
+
+class ReferenceImage:
+    """Precomputed CLIP embeddings of a query image, reused for every candidate it is compared against."""
+
+    def __init__(self, path: str, edge_features: torch.Tensor, raw_features: torch.Tensor, model_name: str,
+                 hashes: Optional[ImageHashes] = None) -> None:
+        """
+        Initialize the reference.
+        
+        Args:
+            path (str): Path or source URL of the query image the embeddings were computed from
+            edge_features (torch.Tensor): CLIP features of the Canny edge image
+            raw_features (torch.Tensor): CLIP features of the raw image
+            model_name (str): Name of the CLIP model that produced the features
+            hashes (Optional[ImageHashes]): Perceptual hashes of the query image, if computed
+        """
+        self.path: str = path
+        self.edge_features: torch.Tensor = edge_features
+        self.raw_features: torch.Tensor = raw_features
+        self.model_name: str = model_name
+        self.hashes: Optional[ImageHashes] = hashes
+
+
+class PreparedCandidate:
+    """A candidate ready for batched scoring: either its cached features or its preprocessed tensors."""
+
+    def __init__(self, key: Optional[str], features: Optional[Tuple[torch.Tensor, torch.Tensor]] = None,
+                 edge_image: Optional[torch.Tensor] = None, raw_image: Optional[torch.Tensor] = None) -> None:
+        """
+        Initialize the prepared candidate.
+        
+        Args:
+            key (Optional[str]): Embedding cache key, None if no cache is attached
+            features (Optional[Tuple[torch.Tensor, torch.Tensor]]): Cached edge and raw features, if any
+            edge_image (Optional[torch.Tensor]): Preprocessed edge image tensor when not cached
+            raw_image (Optional[torch.Tensor]): Preprocessed raw image tensor when not cached
+        """
+        self.key: Optional[str] = key
+        self.features: Optional[Tuple[torch.Tensor, torch.Tensor]] = features
+        self.edge_image: Optional[torch.Tensor] = edge_image
+        self.raw_image: Optional[torch.Tensor] = raw_image
+
 
 class ImageSimilarityComparator:
     """A class to compare two images using edge-based and raw image CLIP feature similarity."""
 
-    def __init__(self, model_name: str = "ViT-B/32", device: Optional[str] = None) -> None:
+    def __init__(self, model_name: str = "ViT-B/32", device: Optional[str] = None, cache: Optional[EmbeddingCache] = None) -> None:
         """
-        Initialize the comparator with a CLIP model.
+        Initialize the comparator with a CLIP model from the shared model registry.
         
         Args:
             model_name (str): Name of the CLIP model to use (default: ViT-B/32)
             device (Optional[str]): Device to run the model on (default: cuda if available, else cpu)
+            cache (Optional[EmbeddingCache]): Persistent embedding cache checked before encoding (default: None)
         """
-        self.device: str = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
-        self.model, self.preprocess = clip.load(model_name, device=self.device)
+        self.cache: Optional[EmbeddingCache] = cache
+        self.model_name: str = model_name
+        self.device: str = resolve_device(device)
+        self.model, self.preprocess = MODEL_REGISTRY.get(model_name, self.device)
     
-    def load_edge_image(self, path: str) -> torch.Tensor:
+    def preprocess_edge(self, pixels: np.ndarray) -> torch.Tensor:
         """
-        Load an image, apply Canny edge detection, and preprocess for CLIP.
+        Apply Canny edge detection to decoded pixels and preprocess for CLIP.
         
         Args:
-            path (str): Path to the image file
+            pixels (np.ndarray): RGB uint8 array
             
         Returns:
             torch.Tensor: Preprocessed edge-detected image tensor
         """
-        # Load image as grayscale
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-        if img is None:
-            raise FileNotFoundError(f"Could not load image at {path}")
+        gray = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
         
         # Apply Canny edge detection
-        edges = cv2.Canny(img, threshold1=100, threshold2=200)
+        edges = cv2.Canny(gray, threshold1=100, threshold2=200)
         
         # Convert to RGB format expected by CLIP
         edges_rgb = cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
@@ -43,56 +608,156 @@ class ImageSimilarityComparator:
         pil_img: Image.Image = Image.fromarray(edges_rgb)
         return self.preprocess(pil_img).unsqueeze(0).to(self.device)
     
-    def load_raw_image(self, path: str) -> torch.Tensor:
+    def preprocess_raw(self, pixels: np.ndarray) -> torch.Tensor:
+        """
+        Preprocess decoded pixels for CLIP.
+        
+        Args:
+            pixels (np.ndarray): RGB uint8 array
+            
+        Returns:
+            torch.Tensor: Preprocessed raw image tensor
+        """
+        return self.preprocess(Image.fromarray(pixels)).unsqueeze(0).to(self.device)
+    
+    def load_edge_image(self, image: ImageInput) -> torch.Tensor:
+        """
+        Load an image, apply Canny edge detection, and preprocess for CLIP.
+        
+        Args:
+            image (ImageInput): Path to the image file or an in-memory candidate
+            
+        Returns:
+            torch.Tensor: Preprocessed edge-detected image tensor
+        """
+        return self.preprocess_edge(as_candidate(image).pixels)
+    
+    def load_raw_image(self, image: ImageInput) -> torch.Tensor:
         """
         Load and preprocess a raw image for CLIP.
         
         Args:
-            path (str): Path to the image file
+            image (ImageInput): Path to the image file or an in-memory candidate
             
         Returns:
             torch.Tensor: Preprocessed raw image tensor
         """
-        # Load image
-        img = Image.open(path).convert("RGB")
-        if img is None:
-            raise FileNotFoundError(f"Could not load image at {path}")
+        return self.preprocess_raw(as_candidate(image).pixels)
+    
+    def _cache_key(self, candidate: CandidateImage) -> Optional[str]:
+        """
+        Build the embedding cache key for an image.
         
-        # Preprocess for CLIP
-        return self.preprocess(img).unsqueeze(0).to(self.device)
+        Args:
+            candidate (CandidateImage): The in-memory image
+            
+        Returns:
+            Optional[str]: Cache key, None if no cache is attached
+        """
+        if self.cache is None:
+            return None
+        return EmbeddingCache.make_key(candidate.digest, self.model_name, PREPROCESS_VERSION)
     
-    def compare_images(self, image_path1: str, image_path2: str, edge_weight: float = 0.6, raw_weight: float = 0.4) -> Optional[float]:
+    def _cached_features(self, key: Optional[str]) -> Optional[Tuple[torch.Tensor, torch.Tensor]]:
         """
-        Compare two images using edge-based and raw image CLIP feature similarity with specified weights.
+        Fetch cached edge and raw features as (1, dim) tensors on the comparator's device.
         
         Args:
-            image_path1 (str): Path to the first image
-            image_path2 (str): Path to the second image
-            edge_weight (float): Weight for edge-based similarity (default: 0.6)
-            raw_weight (float): Weight for raw image similarity (default: 0.4)
+            key (Optional[str]): Cache key from _cache_key
             
         Returns:
-            Optional[float]: Weighted cosine similarity score between the two images, None if error occurs
+            Optional[Tuple[torch.Tensor, torch.Tensor]]: Edge and raw features, None on a miss
+        """
+        if self.cache is None or key is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        edge, raw = entry
+        return (torch.from_numpy(edge).unsqueeze(0).to(self.device),
+                torch.from_numpy(raw).unsqueeze(0).to(self.device))
+    
+    def _store_features(self, key: Optional[str], edge_features: torch.Tensor, raw_features: torch.Tensor) -> None:
+        """
+        Write edge and raw features of one image to the cache.
+        
+        Args:
+            key (Optional[str]): Cache key from _cache_key
+            edge_features (torch.Tensor): Edge features of shape (1, dim)
+            raw_features (torch.Tensor): Raw image features of shape (1, dim)
         """
+        if self.cache is None or key is None:
+            return
         try:
-            # Load and preprocess edge-detected images
-            edge_image1: torch.Tensor = self.load_edge_image(image_path1)
-            edge_image2: torch.Tensor = self.load_edge_image(image_path2)
+            self.cache.put(key, edge_features.squeeze(0).cpu().numpy(), raw_features.squeeze(0).cpu().numpy())
+        except Exception as e:
+            print(f"Error writing embedding cache: {str(e)}")
+    
+    def encode_image(self, image: ImageInput) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Encode an image into its edge-based and raw CLIP feature vectors, using the cache when available.
+        
+        Args:
+            image (ImageInput): Path to the image file or an in-memory candidate
             
-            # Load and preprocess raw images
-            raw_image1: torch.Tensor = self.load_raw_image(image_path1)
-            raw_image2: torch.Tensor = self.load_raw_image(image_path2)
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Edge features and raw image features
+        """
+        candidate: CandidateImage = as_candidate(image)
+        key: Optional[str] = self._cache_key(candidate)
+        cached = self._cached_features(key)
+        if cached is not None:
+            return cached
+        
+        # Both branches share the same decoded pixels
+        edge_image: torch.Tensor = self.preprocess_edge(candidate.pixels)
+        raw_image: torch.Tensor = self.preprocess_raw(candidate.pixels)
+        
+        with torch.no_grad():
+            edge_features: torch.Tensor = self.model.encode_image(edge_image).float()
+            raw_features: torch.Tensor = self.model.encode_image(raw_image).float()
+        
+        self._store_features(key, edge_features, raw_features)
+        return edge_features, raw_features
+    
+    def build_reference(self, image: ImageInput) -> ReferenceImage:
+        """
+        Encode a query image once so it can be compared against many candidates.
+        
+        Args:
+            image (ImageInput): Path to the query image or an in-memory candidate
             
-            # Encode images to get feature vectors
-            with torch.no_grad():
-                edge_features1: torch.Tensor = self.model.encode_image(edge_image1)
-                edge_features2: torch.Tensor = self.model.encode_image(edge_image2)
-                raw_features1: torch.Tensor = self.model.encode_image(raw_image1)
-                raw_features2: torch.Tensor = self.model.encode_image(raw_image2)
+        Returns:
+            ReferenceImage: The query's precomputed edge and raw embeddings
+        """
+        candidate: CandidateImage = as_candidate(image)
+        edge_features, raw_features = self.encode_image(candidate)
+        try:
+            hashes: Optional[ImageHashes] = ImageHashes.from_image(candidate)
+        except Exception as e:
+            print(f"Error hashing reference image: {str(e)}")
+            hashes = None
+        return ReferenceImage(candidate.source, edge_features, raw_features, self.model_name, hashes)
+    
+    def compare_to_reference(self, reference: ReferenceImage, image: ImageInput, edge_weight: float = 0.6, raw_weight: float = 0.4) -> Optional[float]:
+        """
+        Compare a candidate image against a precomputed reference.
+        
+        Args:
+            reference (ReferenceImage): Reference built with build_reference
+            image (ImageInput): Path to the candidate image or an in-memory candidate
+            edge_weight (float): Weight for edge-based similarity (default: 0.6)
+            raw_weight (float): Weight for raw image similarity (default: 0.4)
+            
+        Returns:
+            Optional[float]: Weighted cosine similarity score, None if error occurs
+        """
+        try:
+            edge_features, raw_features = self.encode_image(image)
             
             # Compute cosine similarities
-            edge_similarity: float = torch.cosine_similarity(edge_features1, edge_features2).item()
-            raw_similarity: float = torch.cosine_similarity(raw_features1, raw_features2).item()
+            edge_similarity: float = torch.cosine_similarity(reference.edge_features, edge_features).item()
+            raw_similarity: float = torch.cosine_similarity(reference.raw_features, raw_features).item()
             
             # Combine similarities with 60:40 ratio
             combined_similarity: float = (edge_weight * edge_similarity) + (raw_weight * raw_similarity)
@@ -100,4 +765,120 @@ class ImageSimilarityComparator:
             
         except Exception as e:
             print(f"Error comparing images: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+    
+    def prepare_candidate(self, image: ImageInput) -> PreparedCandidate:
+        """
+        Do the per-candidate work that precedes the forward pass: cache lookup, decode and preprocessing.
+        
+        Args:
+            image (ImageInput): Path to the candidate image or an in-memory candidate
+            
+        Returns:
+            PreparedCandidate: Cached features, or the edge and raw tensors still to be encoded
+        """
+        candidate: CandidateImage = as_candidate(image)
+        key: Optional[str] = self._cache_key(candidate)
+        cached = self._cached_features(key)
+        if cached is not None:
+            return PreparedCandidate(key, features=cached)
+        
+        # Decode once, then share the pixels between the edge and raw branches
+        edge_image: torch.Tensor = self.preprocess_edge(candidate.pixels)
+        raw_image: torch.Tensor = self.preprocess_raw(candidate.pixels)
+        return PreparedCandidate(key, edge_image=edge_image, raw_image=raw_image)
+    
+    def score_prepared(self, reference: ReferenceImage, prepared: Sequence[PreparedCandidate], edge_weight: float = 0.6, raw_weight: float = 0.4) -> torch.Tensor:
+        """
+        Encode prepared candidates in a single forward pass and score them against a reference.
+        
+        Args:
+            reference (ReferenceImage): Reference built with build_reference
+            prepared (Sequence[PreparedCandidate]): Candidates from prepare_candidate
+            edge_weight (float): Weight for edge-based similarity (default: 0.6)
+            raw_weight (float): Weight for raw image similarity (default: 0.4)
+            
+        Returns:
+            torch.Tensor: Weighted cosine similarity per candidate, on the CPU
+        """
+        pending: List[PreparedCandidate] = [item for item in prepared if item.features is None]
+        if pending:
+            # Edge and raw images of uncached candidates share one forward pass
+            batch: torch.Tensor = torch.cat([item.edge_image for item in pending] + [item.raw_image for item in pending])
+            with torch.no_grad():
+                encoded: torch.Tensor = self.model.encode_image(batch).float()
+            edge_encoded, raw_encoded = encoded.split(len(pending))
+            for position, item in enumerate(pending):
+                item.features = (edge_encoded[position:position + 1], raw_encoded[position:position + 1])
+                item.edge_image = item.raw_image = None
+                self._store_features(item.key, *item.features)
+        
+        edge_features: torch.Tensor = torch.cat([item.features[0] for item in prepared])
+        raw_features: torch.Tensor = torch.cat([item.features[1] for item in prepared])
+        
+        edge_similarity: torch.Tensor = torch.cosine_similarity(reference.edge_features, edge_features)
+        raw_similarity: torch.Tensor = torch.cosine_similarity(reference.raw_features, raw_features)
+        return ((edge_weight * edge_similarity) + (raw_weight * raw_similarity)).cpu()
+    
+    def compare_many(self, reference: ReferenceImage, candidates: Sequence[ImageInput], batch_size: int = 16, edge_weight: float = 0.6, raw_weight: float = 0.4) -> torch.Tensor:
+        """
+        Score many candidate images against a reference in batched forward passes.
+        
+        Candidates found in the embedding cache skip encoding; the edge and raw tensors of the
+        rest are stacked into a single batch, so each batch costs one forward pass.
+        
+        Args:
+            reference (ReferenceImage): Reference built with build_reference
+            candidates (Sequence[ImageInput]): Paths to the candidate images or in-memory candidates
+            batch_size (int): Number of candidates encoded per forward pass (default: 16)
+            edge_weight (float): Weight for edge-based similarity (default: 0.6)
+            raw_weight (float): Weight for raw image similarity (default: 0.4)
+            
+        Returns:
+            torch.Tensor: Weighted cosine similarity per candidate on the CPU, NaN where a candidate could not be loaded
+        """
+        scores: torch.Tensor = torch.full((len(candidates),), float("nan"))
+        batch_size = max(1, batch_size)
+        
+        for start in range(0, len(candidates), batch_size):
+            indices: List[int] = []
+            prepared: List[PreparedCandidate] = []
+            
+            for index in range(start, min(start + batch_size, len(candidates))):
+                try:
+                    prepared.append(self.prepare_candidate(candidates[index]))
+                except Exception as e:
+                    source = candidates[index].source if isinstance(candidates[index], CandidateImage) else candidates[index]
+                    print(f"Error loading candidate {source}: {str(e)}")
+                    continue
+                indices.append(index)
+            
+            if not indices:
+                continue
+            
+            try:
+                scores[indices] = self.score_prepared(reference, prepared, edge_weight, raw_weight)
+            except Exception as e:
+                print(f"Error scoring candidate batch starting at {start}: {str(e)}")
+        
+        return scores
+    
+    def compare_images(self, image_path1: str, image_path2: str, edge_weight: float = 0.6, raw_weight: float = 0.4) -> Optional[float]:
+        """
+        Compare two images using edge-based and raw image CLIP feature similarity with specified weights.
+        
+        Args:
+            image_path1 (str): Path to the first image
+            image_path2 (str): Path to the second image
+            edge_weight (float): Weight for edge-based similarity (default: 0.6)
+            raw_weight (float): Weight for raw image similarity (default: 0.4)
+            
+        Returns:
+            Optional[float]: Weighted cosine similarity score between the two images, None if error occurs
+        """
+        try:
+            reference: ReferenceImage = self.build_reference(image_path1)
+        except Exception as e:
+            print(f"Error comparing images: {str(e)}")
+            return None
+        return self.compare_to_reference(reference, image_path2, edge_weight, raw_weight)
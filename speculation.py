@@ -0,0 +1,215 @@
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from driver_pool import DriverPool
+from embedding_cache import content_hash
+from similarity import CandidateImage, ImageHashes, ReferenceImage
+
+
+class PreparedQuery:
+    """Work done for a query image before the search was requested: fingerprint, reference embeddings and a browser."""
+
+    def __init__(self, token: str, image_bytes: bytes) -> None:
+        """
+        Initialize an empty preparation.
+
+        Args:
+            token (str): Identifier handed to the frontend
+            image_bytes (bytes): Encoded query image
+        """
+        self.token: str = token
+        self.image_bytes: bytes = image_bytes
+        self.digest: str = content_hash(image_bytes)
+        self.phash: Optional[int] = None
+        self.reference: Optional[ReferenceImage] = None
+        self.driver: Any = None
+        self.error: Optional[str] = None
+        self.created: float = time.perf_counter()
+        self.seconds: Optional[float] = None
+        self.discarded: bool = False
+        self.done: threading.Event = threading.Event()
+
+    @property
+    def fingerprint(self) -> Optional[tuple]:
+        """(content hash, perceptual hash) of the query, None if the image could not be hashed."""
+        return None if self.phash is None else (self.digest, self.phash)
+
+
+class SpeculativePreparer:
+    """Starts the expensive parts of a search as soon as a query image is selected.
+
+    Only the most recent selection is kept. Selecting another image, discarding the token or
+    leaving it unused for ttl seconds throws the work away and returns its browser to the pool;
+    a search that presents the token (or, lacking one, the same image bytes) adopts the work instead.
+    """
+
+    def __init__(self, pool: DriverPool, build_reference: Callable[[CandidateImage], ReferenceImage],
+                 ttl: float = 120, acquire_browser: bool = True) -> None:
+        """
+        Initialize the preparer.
+
+        Args:
+            pool (DriverPool): Pool the speculative browser is leased from
+            build_reference (Callable[[CandidateImage], ReferenceImage]): Encodes the query image
+            ttl (float): Seconds an unused preparation is kept before it is discarded (default: 120)
+            acquire_browser (bool): Lease a search browser while preparing (default: True)
+        """
+        self.pool: DriverPool = pool
+        self.build_reference: Callable[[CandidateImage], ReferenceImage] = build_reference
+        self.ttl: float = ttl
+        self.acquire_browser: bool = acquire_browser
+        self._lock: threading.Lock = threading.Lock()
+        self._current: Optional[PreparedQuery] = None
+        self._stats: Dict[str, float] = {
+            "prepared": 0,
+            "adopted": 0,
+            "adopted_before_ready": 0,
+            "discarded": 0,
+            "expired": 0,
+            "mismatched": 0,
+            "prepare_seconds": 0.0,
+        }
+
+    def prepare(self, image_bytes: bytes) -> str:
+        """
+        Start preparing a newly selected query image, discarding any earlier selection.
+
+        Args:
+            image_bytes (bytes): Encoded query image
+
+        Returns:
+            str: Token the search presents to adopt the work
+        """
+        prepared = PreparedQuery(uuid.uuid4().hex[:12], image_bytes)
+        with self._lock:
+            previous, self._current = self._current, prepared
+            self._stats["prepared"] += 1
+        if previous is not None:
+            self._discard(previous, "discarded")
+        threading.Thread(target=self._run, args=(prepared,), name="speculative-prepare", daemon=True).start()
+        timer = threading.Timer(self.ttl, self._expire, args=(prepared.token,))
+        timer.daemon = True
+        timer.start()
+        return prepared.token
+
+    def _run(self, prepared: PreparedQuery) -> None:
+        """Fingerprint and encode the query, then lease a browser unless the selection was dropped meanwhile."""
+        try:
+            candidate = CandidateImage(prepared.image_bytes, "query")
+            try:
+                prepared.phash = ImageHashes.from_image(candidate).phash
+            except Exception as e:
+                print(f"SpeculativePreparer: Error fingerprinting query image: {str(e)}")
+            if not prepared.discarded:
+                prepared.reference = self.build_reference(candidate)
+            if self.acquire_browser and not prepared.discarded:
+                driver = self.pool.acquire(self.ttl)
+                with self._lock:
+                    keep = not prepared.discarded
+                    if keep:
+                        prepared.driver = driver
+                if not keep:
+                    self.pool.release(driver)
+        except Exception as e:
+            print(f"SpeculativePreparer: Error preparing query {prepared.token}: {str(e)}")
+            prepared.error = str(e)
+        finally:
+            prepared.seconds = round(time.perf_counter() - prepared.created, 3)
+            with self._lock:
+                self._stats["prepare_seconds"] += prepared.seconds
+            prepared.done.set()
+
+    def _discard(self, prepared: PreparedQuery, reason: str) -> None:
+        """Drop a preparation and return its browser, if it already holds one."""
+        with self._lock:
+            if prepared.discarded:
+                return
+            prepared.discarded = True
+            driver, prepared.driver = prepared.driver, None
+            if self._current is prepared:
+                self._current = None
+            self._stats[reason] += 1
+        if driver is not None:
+            try:
+                self.pool.release(driver)
+            except Exception as e:
+                print(f"SpeculativePreparer: Error returning driver to pool: {str(e)}")
+
+    def _expire(self, token: str) -> None:
+        """Timer callback: discard a preparation nobody adopted within ttl."""
+        with self._lock:
+            prepared = self._current if self._current is not None and self._current.token == token else None
+        if prepared is not None:
+            self._discard(prepared, "expired")
+
+    def discard(self, token: Optional[str] = None) -> bool:
+        """
+        Drop the current preparation, e.g. when the selection is cleared.
+
+        Args:
+            token (Optional[str]): Only discard if it is the current token; None discards whatever is current
+
+        Returns:
+            bool: True if a preparation was discarded
+        """
+        with self._lock:
+            prepared = self._current
+        if prepared is None or (token is not None and prepared.token != token):
+            return False
+        self._discard(prepared, "discarded")
+        return True
+
+    def adopt(self, token: Optional[str], image_bytes: bytes, timeout: Optional[float] = None) -> Optional[PreparedQuery]:
+        """
+        Take over the preparation of the image a search was started with.
+
+        Waits for a preparation still in progress rather than repeating its work. The caller owns
+        the returned browser and must release it to the pool. Without a token, the current
+        preparation is adopted only if it was made for the same image bytes; it is never discarded,
+        since it may belong to another selection.
+
+        Args:
+            token (Optional[str]): Token returned by prepare(), None if the caller has none
+            image_bytes (bytes): Image the search was started with; must match the prepared one
+            timeout (Optional[float]): Maximum seconds to wait for an unfinished preparation
+
+        Returns:
+            Optional[PreparedQuery]: The finished preparation, None if there is nothing usable
+        """
+        with self._lock:
+            prepared = self._current
+        if prepared is None or (token and prepared.token != token):
+            return None
+        if prepared.digest != content_hash(image_bytes):
+            if token:
+                self._discard(prepared, "mismatched")
+            return None
+
+        ready = prepared.done.is_set()
+        if not prepared.done.wait(timeout):
+            self._discard(prepared, "discarded")
+            return None
+        with self._lock:
+            if prepared.discarded or self._current is not prepared:
+                return None
+            self._current = None
+            self._stats["adopted"] += 1
+            if not ready:
+                self._stats["adopted_before_ready"] += 1
+        return prepared
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report speculation counters.
+
+        Returns:
+            Dict[str, Any]: Preparations started, adopted (of which still running at search time), discarded, expired, mismatched and average preparation time
+        """
+        with self._lock:
+            finished = self._stats["prepare_seconds"]
+            prepared = self._stats["prepared"]
+            stats: Dict[str, Any] = {key: int(value) for key, value in self._stats.items() if key != "prepare_seconds"}
+            stats["avg_prepare_seconds"] = round(finished / prepared, 3) if prepared else 0.0
+            stats["pending"] = self._current.token if self._current is not None else None
+            return stats
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# batch_search pulls in the full search stack (Eel, Selenium, CLIP)
+batch_search = pytest.importorskip("batch_search")
+
+
+def test_query_folder_keeps_extension(tmp_path):
+    results_dir = str(tmp_path)
+    jpg = batch_search.query_folder(results_dir, "x.jpg")
+    png = batch_search.query_folder(results_dir, "x.png")
+    assert jpg != png
+    assert os.path.dirname(jpg) == results_dir and os.path.dirname(png) == results_dir
+
+
+def test_query_folder_separates_flattened_paths(tmp_path):
+    results_dir = str(tmp_path)
+    nested = batch_search.query_folder(results_dir, "a/b.jpg")
+    flat = batch_search.query_folder(results_dir, "a__b.jpg")
+    assert nested != flat
+    assert os.path.dirname(nested) == results_dir
+
+
+def test_query_folder_is_stable(tmp_path):
+    # A resumed batch must find the folders of the queries it already ran
+    assert batch_search.query_folder(str(tmp_path), "a/b.jpg") == batch_search.query_folder(str(tmp_path), "a/b.jpg")
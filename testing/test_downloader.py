@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import ImageDownloader
+
+# The image fixtures next to this file are served over a local HTTP server
+FIXTURES_FOLDER = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_NAMES = sorted(name for name in os.listdir(FIXTURES_FOLDER) if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Abandoned downloads reset the connection on purpose
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = QuietServer(("127.0.0.1", 0), partial(QuietHandler, directory=FIXTURES_FOLDER))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def downloader():
+    downloader = ImageDownloader(max_in_flight=8, per_host_limit=4)
+    yield downloader
+    downloader.close()
+
+
+def test_fetch_all_returns_fixtures_in_order(base_url, downloader):
+    urls = [f"{base_url}/{name}" for name in FIXTURE_NAMES] + [f"{base_url}/missing.jpg"]
+    results = list(downloader.fetch_all(urls))
+
+    assert [r.url for r in results] == urls
+    for name, result in zip(FIXTURE_NAMES, results):
+        with open(os.path.join(FIXTURES_FOLDER, name), "rb") as f:
+            assert result.data == f.read(), f"content mismatch for {name}"
+        assert result.width and result.height, f"no header dimensions for {name}"
+    assert not results[-1].ok and results[-1].status_code == 404
+
+
+def test_html_body_is_rejected_by_sniffing(base_url, downloader):
+    # The directory listing is HTML: it must be rejected by sniffing, not by URL
+    listing = downloader.fetch(f"{base_url}/")
+    assert listing.skipped and not listing.ok
+
+
+def test_undersized_images_are_skipped(base_url):
+    strict = ImageDownloader(min_dimension=5000)
+    try:
+        results = list(strict.fetch_all(f"{base_url}/{name}" for name in FIXTURE_NAMES))
+    finally:
+        strict.close()
+    assert all(r.skipped and "Undersized" in r.error for r in results)
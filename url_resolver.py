@@ -0,0 +1,128 @@
+import re
+import threading
+import time
+import requests
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+from downloader import DEFAULT_HEADERS
+
+# google.com, its country domains (google.de, google.co.uk) and their subdomains
+GOOGLE_HOST_PATTERN = re.compile(r"(^|\.)google\.[a-z]{2,3}(\.[a-z]{2})?$")
+
+
+def is_google_host(url: str) -> bool:
+    """True if a URL points at a Google host, i.e. a redirect that has not reached the product page."""
+    host = (urlparse(url).hostname or "").lower()
+    return bool(GOOGLE_HOST_PATTERN.search(host))
+
+
+class RedirectResolver:
+    """Follows redirects of result links to their final URL, with an LRU+TTL cache shared across searches.
+
+    Failed lookups are cached too (for a shorter time), and concurrent lookups of the same link
+    share a single request.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 6 * 3600, negative_ttl: float = 600,
+                 timeout: float = 5, max_workers: int = 8) -> None:
+        """
+        Initialize the resolver.
+
+        Args:
+            max_entries (int): Maximum number of cached links (default: 2048)
+            ttl (float): Seconds a resolved URL stays cached (default: 6 hours)
+            negative_ttl (float): Seconds a failed lookup stays cached (default: 10 minutes)
+            timeout (float): Request timeout in seconds (default: 5)
+            max_workers (int): Lookups run concurrently by map() (default: 8)
+        """
+        self.max_entries: int = max(1, max_entries)
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+        self.timeout: float = timeout
+        self.session: requests.Session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers,
+                                                                thread_name_prefix="redirect-resolver")
+        self._lock: threading.Lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "negative_hits": 0, "shared": 0, "evictions": 0}
+
+    def _lookup(self, href: str) -> Optional[str]:
+        """Issue the HEAD request; None when it fails or does not leave Google."""
+        try:
+            response = self.session.head(href, allow_redirects=True, timeout=self.timeout)
+            return None if is_google_host(response.url) else response.url
+        except Exception as e:
+            print(f"RedirectResolver: Error following redirect for {href}: {str(e)}")
+            return None
+
+    def final_url(self, href: str) -> Optional[str]:
+        """
+        Return the URL a link finally redirects to.
+
+        Args:
+            href (str): Link to follow
+
+        Returns:
+            Optional[str]: The final URL, None if the lookup failed or the redirect stayed on Google
+        """
+        with self._lock:
+            entry = self._cache.get(href)
+            if entry is not None and entry[1] > time.monotonic():
+                self._cache.move_to_end(href)
+                self._stats["negative_hits" if entry[0] is None else "hits"] += 1
+                return entry[0]
+            pending = self._inflight.get(href)
+            if pending is None:
+                future: Future = Future()
+                self._inflight[href] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["shared"] += 1
+        if pending is not None:
+            # Another thread is already resolving this link
+            return pending.result()
+
+        result = self._lookup(href)
+        with self._lock:
+            lifetime = self.ttl if result else self.negative_ttl
+            self._cache[href] = (result, time.monotonic() + lifetime)
+            self._cache.move_to_end(href)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self._stats["evictions"] += 1
+            del self._inflight[href]
+        future.set_result(result)
+        return result
+
+    def map(self, func: Callable[[str], Any], hrefs: Sequence[str]) -> List[Any]:
+        """
+        Apply a link-resolving function to every link concurrently.
+
+        Args:
+            func (Callable[[str], Any]): Function called once per link, typically calling final_url()
+            hrefs (Sequence[str]): Links to resolve
+
+        Returns:
+            List[Any]: Results in the order of hrefs
+        """
+        return list(self._executor.map(func, hrefs))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, negative hits, misses, shared in-flight lookups, evictions and entries
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._cache)
+            return stats
@@ -0,0 +1,251 @@
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+
+def dom_ready(driver: Any) -> bool:
+    """Condition: the document has been parsed (readyState is interactive or complete)."""
+    return driver.execute_script("return document.readyState") in ("interactive", "complete")
+
+
+def page_loaded(driver: Any) -> bool:
+    """Condition: the document and its subresources have loaded (readyState is complete)."""
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def url_changed(from_url: str) -> Callable[[Any], bool]:
+    """
+    Build a condition that holds once the browser has navigated away from a URL.
+
+    Args:
+        from_url (str): URL before the navigation
+
+    Returns:
+        Callable[[Any], bool]: The condition
+    """
+    return lambda driver: driver.current_url != from_url
+
+
+def element_present(by: str, selector: str) -> Callable[[Any], Any]:
+    """
+    Build a condition that returns the first element matching a selector.
+
+    Args:
+        by (str): Selenium locator strategy (By.XPATH, By.CSS_SELECTOR, ...)
+        selector (str): The selector
+
+    Returns:
+        Callable[[Any], Any]: The condition; its result is the element, or None
+    """
+    def condition(driver: Any) -> Any:
+        elements = driver.find_elements(by, selector)
+        return elements[0] if elements else None
+    return condition
+
+
+def element_displayed(by: str, selector: str) -> Callable[[Any], Any]:
+    """
+    Build a condition that returns the first visible element matching a selector.
+
+    Args:
+        by (str): Selenium locator strategy
+        selector (str): The selector
+
+    Returns:
+        Callable[[Any], Any]: The condition; its result is the element, or None
+    """
+    def condition(driver: Any) -> Any:
+        for element in driver.find_elements(by, selector):
+            if element.is_displayed():
+                return element
+        return None
+    return condition
+
+
+def element_gone(element: Any) -> Callable[[Any], bool]:
+    """
+    Build a condition that holds once an element is hidden or detached from the DOM.
+
+    Args:
+        element (Any): The WebElement
+
+    Returns:
+        Callable[[Any], bool]: The condition
+    """
+    def condition(driver: Any) -> bool:
+        try:
+            return not element.is_displayed()
+        except Exception:
+            # Stale element: it has been removed from the page
+            return True
+    return condition
+
+
+def any_condition(*conditions: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Combine conditions so that the first one to hold wins.
+
+    Args:
+        *conditions (Callable[[Any], Any]): Conditions to race
+
+    Returns:
+        Callable[[Any], Any]: The combined condition; its result is the first truthy result
+    """
+    def condition(driver: Any) -> Any:
+        for candidate in conditions:
+            try:
+                result = candidate(driver)
+            except Exception:
+                result = None
+            if result:
+                return result
+        return None
+    return condition
+
+
+def clear_performance_log(driver: Any) -> None:
+    """Read and discard the events buffered in Chrome's performance log, if the driver has one."""
+    try:
+        driver.get_log("performance")
+    except Exception:
+        # Logging is not enabled for this driver
+        pass
+
+
+class WaitEngine:
+    """Waits on explicit readiness conditions with deadlines, recording how long each wait actually took."""
+
+    def __init__(self, driver: Any, poll_interval: float = 0.1) -> None:
+        """
+        Initialize the engine for one driver.
+
+        Args:
+            driver (Any): Selenium driver
+            poll_interval (float): Seconds between condition checks (default: 0.1)
+        """
+        self.driver: Any = driver
+        self.poll_interval: float = poll_interval
+        self.records: List[Dict[str, Any]] = []
+
+    def until(self, condition: Callable[[Any], Any], timeout: float, label: str) -> Any:
+        """
+        Poll a condition until it returns a truthy value or the deadline passes.
+
+        Args:
+            condition (Callable[[Any], Any]): Called with the driver; exceptions count as "not yet"
+            timeout (float): Deadline in seconds
+            label (str): Name recorded with the timing
+
+        Returns:
+            Any: The condition's truthy result, None on timeout
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        result = None
+        while True:
+            try:
+                result = condition(self.driver)
+            except Exception:
+                result = None
+            if result or time.perf_counter() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        self._record(label, time.perf_counter() - start, timeout, bool(result))
+        return result if result else None
+
+    def mark(self) -> None:
+        """
+        Start network tracking afresh; call right before a navigation that network_idle will wait on.
+
+        The performance log holds every event since it was last read, including requests of earlier
+        pages that never report finishing; they would keep network_idle busy until its deadline.
+        """
+        clear_performance_log(self.driver)
+
+    def network_idle(self, timeout: float, label: str, idle_time: float = 0.5, max_inflight: int = 0) -> bool:
+        """
+        Wait until the page has had no more than max_inflight network requests for idle_time seconds.
+
+        Requests are tracked through the CDP Network events in Chrome's performance log, counting only
+        requests sent since the last mark(). When the log is not available, the number of Resource
+        Timing entries is watched instead.
+
+        Args:
+            timeout (float): Deadline in seconds
+            label (str): Name recorded with the timing
+            idle_time (float): Seconds the network must stay quiet (default: 0.5)
+            max_inflight (int): Requests still allowed in flight while counting as idle (default: 0)
+
+        Returns:
+            bool: True if the network went idle before the deadline
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        inflight: set = set()
+        use_cdp = True
+        last_resource_count = -1
+        quiet_since = time.perf_counter()
+        idle = False
+
+        while True:
+            now = time.perf_counter()
+            busy = False
+            if use_cdp:
+                try:
+                    for entry in self.driver.get_log("performance"):
+                        message = json.loads(entry["message"])["message"]
+                        method = message.get("method", "")
+                        request_id = message.get("params", {}).get("requestId")
+                        if method == "Network.requestWillBeSent":
+                            inflight.add(request_id)
+                            busy = True
+                        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                            inflight.discard(request_id)
+                    busy = busy or len(inflight) > max_inflight
+                except Exception:
+                    use_cdp = False
+            if not use_cdp:
+                try:
+                    resource_count = self.driver.execute_script("return performance.getEntriesByType('resource').length")
+                except Exception:
+                    resource_count = last_resource_count
+                busy = resource_count != last_resource_count
+                last_resource_count = resource_count
+
+            if busy:
+                quiet_since = now
+            elif now - quiet_since >= idle_time:
+                idle = True
+                break
+            if now >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        self._record(label, time.perf_counter() - start, timeout, idle)
+        return idle
+
+    def _record(self, label: str, seconds: float, timeout: float, satisfied: bool) -> None:
+        """Store one wait timing."""
+        self.records.append({
+            "label": label,
+            "seconds": round(seconds, 3),
+            "timeout": timeout,
+            "satisfied": satisfied,
+        })
+
+    def total_seconds(self) -> float:
+        """Total time spent waiting."""
+        return round(sum(record["seconds"] for record in self.records), 3)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize all recorded waits.
+
+        Returns:
+            Dict[str, Any]: Total wait time, number of timed-out waits and the individual records
+        """
+        return {
+            "total_seconds": self.total_seconds(),
+            "timeouts": sum(1 for record in self.records if not record["satisfied"]),
+            "waits": list(self.records),
+        }
@@ -1,6 +1,15 @@
 let uploadedImages = [];
 let currentImageIndex = 0;
 let selectedFile = null; // Add global variable to store the selected file
+let currentJobId = null; // Background search job whose events are being displayed
+let currentSearchLevel = null;
+let submittingSearch = false; // Events can arrive before submit_search has returned the job id
+let earlyEvents = [];
+let preparedToken = null; // Backend preparation started when the current image was selected
+let queryUpload = null; // Upload (and then preparation) of the selected image; resolves to its backend source
+
+// Query images are sent to the backend as raw binary chunks of this size
+const UPLOAD_CHUNK_SIZE = 1024 * 1024;
 
 // DOM Elements
 const uploadZone = document.getElementById('upload-zone');
@@ -22,6 +31,9 @@ const deepSearchSlider = document.getElementById('deep-search');
 const searchLevelDisplay = document.getElementById('search-level-display');
 const saveFolder = document.getElementById('save-folder');
 const selectFolderBtn = document.getElementById('select-folder-btn');
+const cancelSearchBtn = document.getElementById('cancel-search-btn');
+const readinessStatus = document.getElementById('readiness-status');
+const readinessIcon = document.getElementById('readiness-icon');
 
 // Initialize Event Listeners
 function initializeEventListeners() {
@@ -44,6 +56,7 @@ function initializeEventListeners() {
 
     // Search Button Event
     searchBtn.addEventListener('click', handleSearch);
+    cancelSearchBtn.addEventListener('click', handleCancelSearch);
 
     // Keyboard Events
     document.addEventListener('keydown', handleKeydown);
@@ -135,9 +148,72 @@ function handleImageUpload(e) {
     }
 }
 
+// Send the selected file to the backend, which validates and downscales it, and return its source reference
+async function uploadQueryImage(file) {
+    let response = await fetch(`/ingest?size=${file.size}`, { method: 'POST' });
+    let body = await response.json();
+    if (!response.ok) {
+        throw body.error;
+    }
+    const uploadId = body.upload_id;
+
+    for (let offset = 0; offset < file.size; offset += UPLOAD_CHUNK_SIZE) {
+        response = await fetch(`/ingest/${uploadId}?offset=${offset}`, {
+            method: 'POST',
+            body: file.slice(offset, offset + UPLOAD_CHUNK_SIZE)
+        });
+        body = await response.json();
+        if (!response.ok) {
+            throw body.error;
+        }
+    }
+    return { upload_id: uploadId };
+}
+
+function startQueryUpload(file) {
+    // Resolves only once prepareSearch has its token, so a search never starts without it
+    queryUpload = uploadQueryImage(file).then(async (source) => {
+        if (selectedFile === file) {
+            await prepareSearch(source, file);
+        }
+        return source;
+    });
+    queryUpload.catch((err) => {
+        if (selectedFile === file) {
+            showError('Could not read the image: ' + err);
+        }
+    });
+    return queryUpload;
+}
+
+// Speculative preparation: the backend fingerprints and encodes the image and leases a browser
+// while the user adjusts the search settings; the search adopts that work through the token
+async function prepareSearch(source, file) {
+    discardPreparedSearch();
+    try {
+        const token = await eel.prepare_search(source)();
+        if (selectedFile === file) {
+            preparedToken = token;
+        } else if (token) {
+            // The selection changed while the backend was preparing
+            eel.discard_prepared_search(token)();
+        }
+    } catch (err) {
+        preparedToken = null;
+    }
+}
+
+function discardPreparedSearch() {
+    if (preparedToken) {
+        eel.discard_prepared_search(preparedToken)();
+        preparedToken = null;
+    }
+}
+
 function handleFileSelect(file) {
     // Store the selected file
     selectedFile = file;
+    discardPreparedSearch();
 
     // Check file size (20MB = 20 * 1024 * 1024 bytes)
     const maxSize = 20 * 1024 * 1024;
@@ -155,16 +231,17 @@ function handleFileSelect(file) {
         return;
     }
 
-    const reader = new FileReader();
-    reader.onload = (e) => {
-        previewImage.src = e.target.result;
-        fileName.textContent = file.name;
-        uploadContent.classList.add('hidden');
-        previewContent.classList.remove('hidden');
-        searchBtn.disabled = false;
-        hideError();
-    };
-    reader.readAsDataURL(file);
+    // Preview straight from the file; the backend gets its own copy through the chunked upload
+    if (previewImage.src.startsWith('blob:')) {
+        URL.revokeObjectURL(previewImage.src);
+    }
+    previewImage.src = URL.createObjectURL(file);
+    fileName.textContent = file.name;
+    uploadContent.classList.add('hidden');
+    previewContent.classList.remove('hidden');
+    searchBtn.disabled = false;
+    hideError();
+    startQueryUpload(file);
 
     // Update the file input to ensure consistency (optional)
     const dataTransfer = new DataTransfer();
@@ -216,38 +293,133 @@ async function handleSearch() {
         return;
     }
     
-    const reader = new FileReader();
-    reader.onload = async (e) => {
-        const imageData = e.target.result;
+    disableFormElements();
+    
+    updateLoadingMessage(deepSearchLevel);
+    loading.classList.remove('hidden');
+    results.classList.add('hidden');
+    hideError();
+
+    try {
+        // Usually uploaded when the image was selected; otherwise wait for (or start) the upload
+        const source = await (selectedFile === file && queryUpload ? queryUpload : startQueryUpload(file));
         
-        disableFormElements();
+        // The search runs as a background job; progress and images arrive through search_event
+        currentSearchLevel = deepSearchLevel;
+        submittingSearch = true;
+        earlyEvents = [];
+        // The job adopts (or discards) the preparation, so the token is used only once
+        const token = preparedToken;
+        preparedToken = null;
+        currentJobId = await eel.submit_search(
+            source, 
+            saveFolderValue,
+            deepSearchLevel,
+            false,
+            token
+        )();
+        submittingSearch = false;
         
-        updateLoadingMessage(deepSearchLevel);
-        loading.classList.remove('hidden');
-        results.classList.add('hidden');
-        hideError();
+        if (!currentJobId) {
+            throw 'the search could not be started';
+        }
+        earlyEvents.splice(0).forEach(search_event);
+    } catch (err) {
+        submittingSearch = false;
+        showError('An error occurred: ' + err);
+        finishSearch();
+    }
+}
+
+// Backend warm-up status: the model and browsers load in the background while an image is picked
+eel.expose(readiness_changed);
+function readiness_changed(status) {
+    if (!status) {
+        return;
+    }
 
-        try {
-            const result = await eel.reverse_image_search_and_scrape(
-                imageData, 
-                saveFolderValue,
-                deepSearchLevel
-            )();
-            
-            if (result.error) {
-                showError(result.error);
-                return;
-            }
-
-            displayResults(result, deepSearchLevel);
-        } catch (err) {
-            showError('An error occurred: ' + err);
-        } finally {
-            enableFormElements();
-            loading.classList.add('hidden');
+    const browserLabel = {
+        'pending': 'starting',
+        'launching': 'starting',
+        'ready': 'ready',
+        'on demand': 'on demand',
+        'error': 'unavailable'
+    }[status.browser] || status.browser;
+
+    if (status.model === 'error') {
+        readinessStatus.textContent = 'Image model failed to load';
+        readinessIcon.className = 'fas fa-exclamation-circle text-red-500 mr-1';
+    } else if (status.model === 'ready') {
+        readinessStatus.textContent = `Image model ready · browser ${browserLabel}`;
+        readinessIcon.className = status.browser === 'ready' || status.browser === 'on demand'
+            ? 'fas fa-check-circle text-green-500 mr-1'
+            : 'fas fa-circle-notch fa-spin mr-1';
+    } else {
+        readinessStatus.textContent = `Loading image model · browser ${browserLabel}`;
+        readinessIcon.className = 'fas fa-circle-notch fa-spin mr-1';
+    }
+}
+
+async function loadReadiness() {
+    try {
+        readiness_changed(await eel.get_readiness()());
+    } catch (err) {
+        readinessStatus.textContent = 'Backend unavailable';
+    }
+}
+
+function handleCancelSearch() {
+    if (currentJobId) {
+        eel.cancel_search(currentJobId)();
+    }
+}
+
+function finishSearch() {
+    currentJobId = null;
+    enableFormElements();
+    loading.classList.add('hidden');
+}
+
+const stageMessages = {
+    'fingerprint': 'Preparing your image...',
+    'cached': 'Found a previous search for this image...',
+    'encoding query': 'Analyzing your image...',
+    'uploading': 'Running the reverse image search...',
+    'reading results': 'Reading search results...',
+    'scraping products': 'Collecting product images...'
+};
+
+// Called by the backend for every event of a search job
+eel.expose(search_event);
+function search_event(event) {
+    if (event && submittingSearch) {
+        earlyEvents.push(event);
+        return;
+    }
+    if (!event || event.job_id !== currentJobId) {
+        return;
+    }
+
+    if (event.type === 'stage') {
+        const loadingElement = loading.querySelector('p:first-of-type');
+        loadingElement.textContent = stageMessages[event.stage] || loadingElement.textContent;
+    } else if (event.type === 'image') {
+        if (results.classList.contains('hidden')) {
+            displayResults({ images: [] }, currentSearchLevel);
         }
-    };
-    reader.readAsDataURL(file);
+        appendResultImage(event);
+    } else if (event.type === 'done') {
+        if (results.classList.contains('hidden')) {
+            displayResults({ images: [] }, currentSearchLevel);
+        }
+        finishSearch();
+    } else if (event.type === 'error') {
+        showError(event.error);
+        finishSearch();
+    } else if (event.type === 'cancelled') {
+        showError('Search cancelled.');
+        finishSearch();
+    }
 }
 
 function updateLoadingMessage(searchLevel) {
@@ -288,29 +460,40 @@ function displayResults(result, searchLevel) {
         </div>
     `;
 
-    uploadedImages = result.saved_images;
+    uploadedImages = [];
     imageGallery.innerHTML = '';
+    result.images.forEach(appendResultImage);
+    updateImageCount();
+
+    results.classList.remove('hidden');
+}
+
+function updateImageCount() {
     imageCount.textContent = `${uploadedImages.length} images found`;
+}
 
-    uploadedImages.forEach((imgData, index) => {
-        const imageContainer = document.createElement('div');
-        imageContainer.className = 'relative group';
-        
-        imageContainer.innerHTML = `
-            <div class="bg-white rounded-lg shadow-md overflow-hidden hover:shadow-xl transition-shadow">
-                <img src="${imgData}" alt="Similar Image ${index + 1}" class="image-box w-full h-70 object-cover" data-index="${index}">
-                <div class="absolute inset-0 bg-black bg-opacity-0 group-hover:bg-opacity-20 transition-all duration-300 flex items-center justify-center">
-                    <div class="opacity-0 group-hover:opacity-100 transition-opacity">
-                        <i class="text-white text-2xl"></i>
-                    </div>
+// Images arrive as a small thumbnail plus a local URL; the full file is only loaded when opened
+function appendResultImage(image) {
+    const index = uploadedImages.length;
+    uploadedImages.push(image);
+
+    const imageContainer = document.createElement('div');
+    imageContainer.className = 'relative group cursor-pointer';
+    imageContainer.addEventListener('click', () => window.open(image.full_url, '_blank'));
+    
+    imageContainer.innerHTML = `
+        <div class="bg-white rounded-lg shadow-md overflow-hidden hover:shadow-xl transition-shadow">
+            <img src="${image.thumbnail}" alt="Similar Image ${index + 1}" class="image-box w-full h-70 object-cover" data-index="${index}">
+            <div class="absolute inset-0 bg-black bg-opacity-0 group-hover:bg-opacity-20 transition-all duration-300 flex items-center justify-center">
+                <div class="opacity-0 group-hover:opacity-100 transition-opacity">
+                    <i class="text-white text-2xl"></i>
                 </div>
             </div>
-        `;
-        
-        imageGallery.appendChild(imageContainer);
-    });
-
-    results.classList.remove('hidden');
+        </div>
+    `;
+    
+    imageGallery.appendChild(imageContainer);
+    updateImageCount();
 }
 
 function getSearchIntensityText(level) {
@@ -415,4 +598,5 @@ function initializeSliderInteractions() {
 document.addEventListener('DOMContentLoaded', () => {
     initializeEventListeners();
     initializeSliderInteractions();
+    loadReadiness();
 });
\ No newline at end of file